@@ -0,0 +1,28 @@
+"""add evidence export index
+
+Revision ID: 005_evidence_export_index
+Revises: 004_add_exports_table
+Create Date: 2025-11-20 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '005_evidence_export_index'
+down_revision = '004_add_exports_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves the export query (application + tenant, ordered by created_at) without a sort
+    op.create_index(
+        'ix_evidence_app_tenant_created',
+        'evidence',
+        ['application_id', 'tenant_id', 'created_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evidence_app_tenant_created', table_name='evidence')
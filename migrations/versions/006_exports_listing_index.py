@@ -0,0 +1,31 @@
+"""replace exports tenant/app index with listing index
+
+Revision ID: 006_exports_listing_index
+Revises: 005_evidence_export_index
+Create Date: 2025-11-24 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '006_exports_listing_index'
+down_revision = '005_evidence_export_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves the export listing (tenant + application, optional status, by created_at);
+    # its (tenant_id, application_id) prefix makes ix_exports_tenant_app redundant
+    op.create_index(
+        'ix_exports_tenant_app_status_created',
+        'exports',
+        ['tenant_id', 'application_id', 'status', 'created_at'],
+    )
+    op.drop_index('ix_exports_tenant_app', table_name='exports')
+
+
+def downgrade() -> None:
+    op.create_index('ix_exports_tenant_app', 'exports', ['tenant_id', 'application_id'])
+    op.drop_index('ix_exports_tenant_app_status_created', table_name='exports')
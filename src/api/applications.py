@@ -2,8 +2,7 @@
 Applications API - Create and manage restaurant permit applications
 """
 
-import uuid
-from typing import List
+import secrets
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
@@ -30,7 +29,7 @@ async def create_application(
     """
     # Create application
     application = Application(
-        application_id=f"app_{uuid.uuid4().hex[:12]}",
+        application_id=f"app_{secrets.token_hex(6)}",
         tenant_id=tenant_id,
         applicant_id=current_user["user_id"],
         application_type=application_data.application_type,
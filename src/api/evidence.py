@@ -1,8 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, status, Request
+from fastapi import APIRouter, Depends, status, Request
+from fastapi.responses import Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
 from datetime import datetime, timezone, timedelta
-from typing import Annotated, Optional
-import hashlib
+import io
+import orjson
+from typing import Optional
 
 from ..schemas.evidence import (
     EvidenceUploadRequest,
@@ -14,7 +18,9 @@ from ..core.database import get_db
 from ..core.errors import problem_response
 from ..core.auth import get_current_user, AuthContext
 from ..core.config import settings
-from ..services.storage import storage_service
+from ..core.mime_config import MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES
+from ..services.storage import HASH_CHUNK_SIZE, storage_service
+from ..services.ingest import IngestAccumulator
 from ..services.integrity import integrity_service
 from ..services.exif_extractor import exif_extractor
 from ..services.audit import audit_service
@@ -22,11 +28,42 @@ from ..services.audit import audit_service
 router = APIRouter()
 
 
-@router.post("/", response_model=EvidenceResponse, status_code=status.HTTP_201_CREATED)
+# The multipart body is read by the handler itself, after the Content-Length
+# precheck, so it is documented here rather than through File/Form parameters
+_UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "evidence_json"],
+                    "properties": {
+                        "file": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "Evidence file",
+                        },
+                        "evidence_json": {
+                            "type": "string",
+                            "description": "EvidenceUploadRequest JSON",
+                        },
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "/",
+    response_model=EvidenceResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_UPLOAD_REQUEST_BODY,
+)
 async def upload_evidence(
     request: Request,
-    file: Annotated[UploadFile, File(description="Evidence file")],
-    evidence_json: Annotated[str, Form(description="EvidenceUploadRequest JSON")],
     db: Session = Depends(get_db),
     auth: Optional[AuthContext] = Depends(get_current_user),
 ) -> EvidenceResponse:
@@ -68,8 +105,8 @@ async def upload_evidence(
     if content_length:
         try:
             size = int(content_length)
-            # Use max across all types (50 MB for video)
-            if size > 50 * 1024 * 1024:
+            # Largest per-type limit (50 MB for video) plus multipart framing
+            if size > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
                 audit_service.log(
                     db=db,
                     correlation_id=correlation_id,
@@ -88,11 +125,47 @@ async def upload_evidence(
                     status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                     code="FILE_TOO_LARGE",
                     title="File Size Exceeds Limit",
-                    detail=f"Content-Length {size} exceeds maximum 50MB",
+                    detail=f"Content-Length {size} exceeds maximum {MAX_UPLOAD_BYTES // (1024 * 1024)}MB",
                 )
         except ValueError:
             pass
 
+    # Parsed only now, so a request refused above is never read
+    async with request.form() as form:
+        file = form.get("file")
+        evidence_json = form.get("evidence_json")
+        if not isinstance(file, UploadFile) or not isinstance(evidence_json, str):
+            return problem_response(
+                request=request,
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                code="INVALID_UPLOAD_FORM",
+                title="Invalid Upload Form",
+                detail="multipart/form-data with a 'file' part and an 'evidence_json' field is required",
+            )
+        return await _ingest_upload(
+            request,
+            file,
+            evidence_json,
+            db,
+            tenant_id=tenant_id,
+            uploader_id=uploader_id,
+            uploader_role=uploader_role,
+            correlation_id=correlation_id,
+        )
+
+
+async def _ingest_upload(
+    request: Request,
+    file: UploadFile,
+    evidence_json: str,
+    db: Session,
+    *,
+    tenant_id: str,
+    uploader_id: str,
+    uploader_role: str,
+    correlation_id: str,
+) -> EvidenceResponse:
+    """Steps 1-11 of upload_evidence, once the form has been parsed"""
     # ========== 1. IDEMPOTENCY CHECK ==========
     idempotency_key = request.headers.get("Idempotency-Key")
     if idempotency_key:
@@ -134,16 +207,17 @@ async def upload_evidence(
         )
 
     # ========== 3. CHECK DUPLICATE EVIDENCE_ID (tenant-scoped) ==========
-    existing = (
-        db.query(Evidence)
-        .filter(
+    # Key column only: no row is hydrated just to test for existence
+    existing_id = db.scalar(
+        select(Evidence.evidence_id)
+        .where(
             Evidence.evidence_id == evidence.evidence_id,
             Evidence.tenant_id == tenant_id,
         )
-        .first()
+        .limit(1)
     )
 
-    if existing:
+    if existing_id is not None:
         audit_service.log(
             db=db,
             correlation_id=correlation_id,
@@ -166,10 +240,8 @@ async def upload_evidence(
         )
 
     # ========== 4. STREAMING HASH + SIZE ENFORCEMENT ==========
-    hasher = hashlib.sha256()
-    file_size = 0
-    chunks = []
-    chunk_size = 65536
+    acc = IngestAccumulator()
+    chunk_size = HASH_CHUNK_SIZE
 
     # Per-type limit
     from ..core.mime_config import get_policy
@@ -183,9 +255,9 @@ async def upload_evidence(
             if not chunk:
                 break
 
-            file_size += len(chunk)
+            acc.feed(chunk)
 
-            if file_size > max_size:
+            if acc.size > max_size:
                 audit_service.log(
                     db=db,
                     correlation_id=correlation_id,
@@ -198,7 +270,7 @@ async def upload_evidence(
                     result="rejected",
                     metadata={
                         "reason": "file_too_large",
-                        "size": file_size,
+                        "size": acc.size,
                         "limit": max_size,
                         "type": evidence.evidence_type.value,
                     },
@@ -212,11 +284,9 @@ async def upload_evidence(
                     detail=f"{evidence.evidence_type.value} limit: {policy.max_size_mb}MB",
                 )
 
-            hasher.update(chunk)
-            chunks.append(chunk)
-
-        file_bytes = b"".join(chunks)
-        server_hash = hasher.hexdigest()
+        file_bytes = acc.getvalue()
+        file_size = acc.size
+        server_hash = acc.sha256
 
     except Exception as e:
         audit_service.log(
@@ -242,17 +312,17 @@ async def upload_evidence(
 
     # ========== 5. DUPLICATE CONTENT (tenant + replay window) ==========
     replay_cutoff = datetime.now(timezone.utc) - timedelta(days=settings.REPLAY_WINDOW_DAYS)
-    existing_hash = (
-        db.query(Evidence)
-        .filter(
+    existing_hash = db.execute(
+        select(Evidence.evidence_id, Evidence.created_at)
+        .where(
             Evidence.tenant_id == tenant_id,
             Evidence.sha256_hash_server == server_hash,
             Evidence.created_at >= replay_cutoff,
         )
-        .first()
-    )
+        .limit(1)
+    ).first()
 
-    if existing_hash:
+    if existing_hash is not None:
         audit_service.log(
             db=db,
             correlation_id=correlation_id,
@@ -282,18 +352,23 @@ async def upload_evidence(
             },
         )
 
-    # ========== 6. EXTRACT EXIF ==========
+    # ========== 6. EXTRACT EXIF (from the ingest head) ==========
+    head = acc.head
     exif_data = {}
     if evidence.evidence_type == "photo":
-        exif_data = exif_extractor.extract(file_bytes)
+        exif_data = exif_extractor.extract_head(head, include_raw=True)
+        if exif_data is None:
+            # Non-JPEG or EXIF segment beyond the head: use the full file
+            exif_data = exif_extractor._extract_decoded(file_bytes, include_raw=True)
 
     # ========== 7. INTEGRITY VALIDATION ==========
     integrity_check, detected_mime = integrity_service.validate(
         evidence=evidence,
-        server_hash=server_hash,
+        # Fresh view of the ingested bytes; validate sniffs the MIME type from it
+        file_stream=io.BytesIO(file_bytes),
         file_size=file_size,
-        file_bytes=file_bytes,
         exif_data=exif_data,
+        server_hash=server_hash,
     )
 
     if not integrity_check.integrity_passed:
@@ -458,13 +533,45 @@ async def upload_evidence(
     return response
 
 
+def _evidence_detail_payload(evidence: Evidence, storage_uri: Optional[str]) -> dict:
+    """
+    Build the EvidenceDetailResponse body straight from the ORM row
+
+    Values come from validated DB columns, so the payload is encoded once
+    with orjson instead of being validated into a Pydantic model and then
+    re-encoded by FastAPI.
+    """
+    return {
+        "evidence_id": evidence.evidence_id,
+        "application_id": evidence.application_id,
+        "evidence_type": evidence.evidence_type,
+        "mime_type": evidence.mime_type,
+        "file_size_bytes": evidence.file_size_bytes,
+        "sha256_hash_device": evidence.sha256_hash_device,
+        "sha256_hash_server": evidence.sha256_hash_server,
+        "captured_at_device": evidence.captured_at_device,
+        "captured_at_server": evidence.captured_at_server,
+        "time_drift_seconds": evidence.time_drift_seconds,
+        "gps_latitude": evidence.gps_latitude,
+        "gps_longitude": evidence.gps_longitude,
+        "gps_accuracy_meters": evidence.gps_accuracy_meters,
+        "exif_data": evidence.exif_data,
+        "uploader_role": evidence.uploader_role,
+        "storage_uri": storage_uri,
+        "integrity_passed": evidence.integrity_passed,
+        "integrity_issues": evidence.integrity_issues,
+        "created_at": evidence.created_at,
+        "updated_at": evidence.updated_at,
+    }
+
+
 @router.get("/{evidence_id}", response_model=EvidenceDetailResponse)
 async def get_evidence(
     request: Request,
     evidence_id: str,
     db: Session = Depends(get_db),
     auth: Optional[AuthContext] = Depends(get_current_user),
-) -> EvidenceDetailResponse:
+) -> Response:
     """Retrieve evidence record by ID (tenant-scoped)"""
     tenant_id = auth.tenant_id if auth else "dev_tenant"
 
@@ -492,27 +599,9 @@ async def get_evidence(
         expires_in_seconds=3600
     )
 
-    return EvidenceDetailResponse(
-        evidence_id=evidence.evidence_id,
-        application_id=evidence.application_id,
-        evidence_type=evidence.evidence_type,
-        mime_type=evidence.mime_type,
-        file_size_bytes=evidence.file_size_bytes,
-        sha256_hash_device=evidence.sha256_hash_device,
-        sha256_hash_server=evidence.sha256_hash_server,
-        captured_at_device=evidence.captured_at_device,
-        captured_at_server=evidence.captured_at_server,
-        time_drift_seconds=evidence.time_drift_seconds,
-        gps_latitude=evidence.gps_latitude,
-        gps_longitude=evidence.gps_longitude,
-        gps_accuracy_meters=evidence.gps_accuracy_meters,
-        exif_data=evidence.exif_data,
-        uploader_role=evidence.uploader_role,
-        storage_uri=storage_uri,
-        integrity_passed=evidence.integrity_passed,
-        integrity_issues=evidence.integrity_issues,
-        created_at=evidence.created_at,
-        updated_at=evidence.updated_at,
+    return Response(
+        orjson.dumps(_evidence_detail_payload(evidence, storage_uri)),
+        media_type="application/json",
     )
 
 
@@ -521,7 +610,7 @@ async def list_evidence_for_application(
     application_id: str,
     db: Session = Depends(get_db),
     auth: Optional[AuthContext] = Depends(get_current_user),
-) -> list[EvidenceDetailResponse]:
+) -> Response:
     """List all evidence for application (tenant-scoped)"""
     tenant_id = auth.tenant_id if auth else "dev_tenant"
 
@@ -536,37 +625,14 @@ async def list_evidence_for_application(
     )
 
     # Build response list with presigned URLs
-    response_list = []
-    for e in evidence_list:
-        # Generate presigned URL for each evidence item
-        storage_uri = storage_service.generate_presigned_url(
-            blob_path=e.storage_path,
-            expires_in_seconds=3600
+    payload = [
+        _evidence_detail_payload(
+            e,
+            storage_service.generate_presigned_url(
+                blob_path=e.storage_path,
+                expires_in_seconds=3600
+            ),
         )
-
-        response_list.append(
-            EvidenceDetailResponse(
-                evidence_id=e.evidence_id,
-                application_id=e.application_id,
-                evidence_type=e.evidence_type,
-                mime_type=e.mime_type,
-                file_size_bytes=e.file_size_bytes,
-                sha256_hash_device=e.sha256_hash_device,
-                sha256_hash_server=e.sha256_hash_server,
-                captured_at_device=e.captured_at_device,
-                captured_at_server=e.captured_at_server,
-                time_drift_seconds=e.time_drift_seconds,
-                gps_latitude=e.gps_latitude,
-                gps_longitude=e.gps_longitude,
-                gps_accuracy_meters=e.gps_accuracy_meters,
-                exif_data=e.exif_data,
-                uploader_role=e.uploader_role,
-                storage_uri=storage_uri,
-                integrity_passed=e.integrity_passed,
-                integrity_issues=e.integrity_issues,
-                created_at=e.created_at,
-                updated_at=e.updated_at,
-            )
-        )
-
-    return response_list
+        for e in evidence_list
+    ]
+    return Response(orjson.dumps(payload), media_type="application/json")
@@ -2,9 +2,9 @@
 Export API endpoints for creating and downloading evidence packages
 """
 import logging
-import uuid
-from fastapi import APIRouter, Depends, Request, status
-from fastapi.responses import Response
+import secrets
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone, timedelta
 from typing import Optional
@@ -15,40 +15,73 @@ from ..schemas.exports import (
     ExportDownloadResponse,
     ExportListItem,
 )
-from ..db.models import Export
+from ..db.models import Evidence, Export
 from ..core.database import get_db
 from ..core.errors import problem_response
 from ..core.auth import get_current_user, AuthContext
 from ..core.config import settings
-from ..services.exports import export_service
 from ..services.storage import storage_service
 from ..services.audit import audit_service
+from ..tasks.exports import build_export
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/applications/{application_id}", response_model=ExportStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+@router.post(
+    "/applications/{application_id}",
+    response_model=ExportStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "NO_EVIDENCE problem: the application has no evidence for this tenant",
+        },
+    },
+)
 async def create_export(
     request: Request,
     application_id: str,
     export_request: ExportCreateRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     auth: Optional[AuthContext] = Depends(get_current_user),
 ):
     """
     Create a new export package for an application
 
-    Returns immediately with export ID and status "pending".
+    Returns immediately with export ID and status "pending"; the package is
+    built in the background after the response is sent.
     Client should poll GET /exports/{export_id} for completion.
+
+    Evidence is only counted here, in one SELECT COUNT(*) on
+    (application_id, tenant_id); the rows are streamed by the build task.
+    An application without evidence gets a 404 NO_EVIDENCE problem instead
+    of a pending export that could only fail.
     """
     correlation_id = getattr(request.state, "correlation_id", "unknown")
     tenant_id = auth.tenant_id if auth else "dev_tenant"
     user_id = auth.user_id if auth else "dev_user"
 
+    evidence_count = db.scalar(
+        select(func.count())
+        .select_from(Evidence)
+        .where(
+            Evidence.application_id == application_id,
+            Evidence.tenant_id == tenant_id,
+        )
+    )
+    if not evidence_count:
+        return problem_response(
+            request=request,
+            status=status.HTTP_404_NOT_FOUND,
+            code="NO_EVIDENCE",
+            title="No Evidence Found",
+            detail=f"No evidence found for application {application_id}",
+        )
+
     # Generate export ID
-    export_id = f"export_{uuid.uuid4().hex[:16]}"
+    export_id = f"export_{secrets.token_hex(8)}"
 
     # Create export record
     db_export = Export(
@@ -83,16 +116,7 @@ async def create_export(
             metadata={"application_id": application_id},
         )
 
-        # Process export immediately (in production, this would be async/background task)
-        try:
-            _process_export(db, db_export, tenant_id)
-        except Exception as e:
-            logger.error(f"Failed to process export {export_id}: {e}")
-            db_export.status = "failed"
-            db_export.error_message = str(e)
-            db.commit()
-
-        db.refresh(db_export)
+        background_tasks.add_task(build_export, export_id)
 
     except Exception as e:
         db.rollback()
@@ -117,51 +141,6 @@ async def create_export(
     )
 
 
-def _process_export(db: Session, db_export: Export, tenant_id: str):
-    """
-    Process export (synchronous for MVP, should be async in production)
-    """
-    try:
-        # Update status
-        db_export.status = "processing"
-        db.commit()
-
-        # Create export package
-        zip_bytes, file_count, signature = export_service.create_export_package(
-            db=db,
-            export_id=db_export.export_id,
-            application_id=db_export.application_id,
-            tenant_id=tenant_id,
-            include_metadata=db_export.include_metadata,
-            sign_package=db_export.sign_package,
-        )
-
-        # Upload to storage
-        storage_path = f"{settings.EXPORT_STORAGE_PREFIX}{db_export.export_id}.zip"
-        blob_client = storage_service.client.get_blob_client(
-            container=storage_service.container_name,
-            blob=storage_path,
-        )
-        blob_client.upload_blob(zip_bytes, overwrite=True, content_settings={"content_type": "application/zip"})
-
-        # Update export record
-        db_export.status = "completed"
-        db_export.storage_path = storage_path
-        db_export.file_count = file_count
-        db_export.total_size_bytes = len(zip_bytes)
-        db_export.signature = signature
-        db_export.completed_at = datetime.now(timezone.utc)
-
-        db.commit()
-
-    except Exception as e:
-        logger.error(f"Export processing failed: {e}")
-        db_export.status = "failed"
-        db_export.error_message = str(e)
-        db.commit()
-        raise
-
-
 @router.get("/{export_id}", response_model=ExportStatusResponse)
 async def get_export_status(
     request: Request,
@@ -248,8 +227,11 @@ async def get_export_download_url(
             detail=f"Export status is '{export.status}', must be 'completed'",
         )
 
-    # Check if expired
-    if export.expires_at and export.expires_at < datetime.now(timezone.utc):
+    # Check if expired (DateTime columns come back naive; stored values are UTC)
+    expires_at = export.expires_at
+    if expires_at and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at and expires_at < datetime.now(timezone.utc):
         return problem_response(
             request=request,
             status=status.HTTP_410_GONE,
@@ -276,23 +258,25 @@ async def get_export_download_url(
 async def list_exports_for_application(
     request: Request,
     application_id: str,
+    status_filter: Optional[str] = Query(None, alias="status"),
     db: Session = Depends(get_db),
     auth: Optional[AuthContext] = Depends(get_current_user),
 ):
     """
     List all exports for an application (tenant-scoped)
+
+    Optionally filtered by status (?status=completed)
     """
     tenant_id = auth.tenant_id if auth else "dev_tenant"
 
-    exports = (
-        db.query(Export)
-        .filter(
-            Export.application_id == application_id,
-            Export.tenant_id == tenant_id,
-        )
-        .order_by(Export.created_at.desc())
-        .all()
+    query = db.query(Export).filter(
+        Export.tenant_id == tenant_id,
+        Export.application_id == application_id,
     )
+    if status_filter is not None:
+        query = query.filter(Export.status == status_filter)
+
+    exports = query.order_by(Export.created_at.desc()).all()
 
     return [
         ExportListItem(
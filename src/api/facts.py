@@ -2,7 +2,7 @@
 Facts API - Submit and manage application facts
 """
 
-import uuid
+import secrets
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
@@ -62,7 +62,7 @@ async def submit_fact(
     
     # Create new fact
     fact = ApplicationFact(
-        fact_id=f"fact_{uuid.uuid4().hex[:12]}",
+        fact_id=f"fact_{secrets.token_hex(6)}",
         application_id=application_id,
         fact_name=fact_data.fact_name,
         fact_value={
@@ -130,7 +130,7 @@ async def submit_facts_batch(
         else:
             # Create
             fact = ApplicationFact(
-                fact_id=f"fact_{uuid.uuid4().hex[:12]}",
+                fact_id=f"fact_{secrets.token_hex(6)}",
                 application_id=application_id,
                 fact_name=fact_data.fact_name,
                 fact_value={
@@ -45,6 +45,7 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
+    RATE_LIMIT_MAX_CLIENTS: int = 10000  # LRU bound on tracked clients
 
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -58,6 +59,7 @@ class Settings(BaseSettings):
     MAX_TIME_DRIFT_SECONDS: float = 30.0
     MIN_GPS_ACCURACY_METERS: float = 50.0
     REPLAY_WINDOW_DAYS: int = 30
+    MIME_SNIFF_FULL_FILE: bool = False  # Sniff the whole upload instead of its header
 
     # Export Settings
     EXPORT_RETENTION_DAYS: int = 90
@@ -0,0 +1,161 @@
+"""
+Unified ASGI middleware: CORS, correlation ID and rate limiting in one layer
+"""
+import uuid
+from typing import List, Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .correlation import correlation_id_var
+from .rate_limit import TokenBucket
+
+# Paths exempt from rate limiting (probes and service index)
+RATE_LIMIT_EXEMPT_PATHS = frozenset({"/health", "/livez", "/"})
+
+EXPOSE_HEADERS = (
+    b"X-Correlation-Id, X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset, "
+    b"X-RateLimit-Remaining-Minute, X-RateLimit-Remaining-Hour"
+)
+PREFLIGHT_ALLOW_METHODS = "DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+PREFLIGHT_MAX_AGE = "600"
+
+
+class UnifiedMiddleware:
+    """
+    Single pure-ASGI middleware replacing the CORS, correlation ID and
+    rate-limit layers.
+
+    - Answers CORS preflights without calling the application
+    - Reads or generates X-Correlation-Id and stores it in scope["state"]
+    - Enforces per-IP rate limits (when a limiter is given)
+    - Injects correlation, rate-limit and CORS headers in one `send` wrapper
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: List[str],
+        limiter: Optional[TokenBucket] = None,
+    ):
+        self.app = app
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = frozenset(allow_origins)
+        self.limiter = limiter
+
+    def _origin_allowed(self, origin: str) -> bool:
+        return self.allow_all_origins or origin in self.allow_origins
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        origin = headers.get("origin")
+
+        correlation_id = headers.get("x-correlation-id") or str(uuid.uuid4())
+        correlation_id_var.set(correlation_id)
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+
+        vary_origin = origin is not None
+        extra_headers = [(b"x-correlation-id", correlation_id.encode("latin-1"))]
+        if origin is not None and self._origin_allowed(origin):
+            extra_headers += [
+                (b"access-control-allow-origin", origin.encode("latin-1")),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-expose-headers", EXPOSE_HEADERS),
+            ]
+
+        # CORS preflight: answer directly, never reaches routing or rate limiting
+        if (
+            scope["method"] == "OPTIONS"
+            and origin is not None
+            and "access-control-request-method" in headers
+        ):
+            await self._preflight(scope, receive, send, headers, origin, extra_headers)
+            return
+
+        if self.limiter is not None and scope["path"] not in RATE_LIMIT_EXEMPT_PATHS:
+            forwarded = headers.get("x-forwarded-for")
+            if forwarded:
+                client_ip = forwarded.split(",")[0]
+            else:
+                client = scope.get("client")
+                client_ip = client[0] if client else "unknown"
+
+            result = self.limiter.consume(client_ip)
+            extra_headers += [
+                (b"x-ratelimit-limit", str(self.limiter.rate_per_minute).encode()),
+                (b"x-ratelimit-remaining", str(result.remaining_minute).encode()),
+                (b"x-ratelimit-reset", str(result.reset_seconds).encode()),
+                (b"x-ratelimit-remaining-minute", str(result.remaining_minute).encode()),
+                (b"x-ratelimit-remaining-hour", str(result.remaining_hour).encode()),
+            ]
+
+            if not result.allowed:
+                response = JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={
+                        "type": "https://permia.is/errors/rate-limit-exceeded",
+                        "title": "Rate Limit Exceeded",
+                        "status": 429,
+                        "detail": "Too many requests. Please try again later.",
+                    },
+                    headers={"Retry-After": "60"},
+                )
+                await response(scope, receive, _with_headers(send, extra_headers, vary_origin))
+                return
+
+        await self.app(scope, receive, _with_headers(send, extra_headers, vary_origin))
+
+    async def _preflight(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        headers: Headers,
+        origin: str,
+        extra_headers: list,
+    ) -> None:
+        if not self._origin_allowed(origin):
+            response = PlainTextResponse("Disallowed CORS origin", status_code=400)
+            await response(scope, receive, _with_headers(send, extra_headers, True))
+            return
+
+        preflight_headers = {
+            "Access-Control-Allow-Methods": PREFLIGHT_ALLOW_METHODS,
+            "Access-Control-Max-Age": PREFLIGHT_MAX_AGE,
+        }
+        requested_headers = headers.get("access-control-request-headers")
+        if requested_headers:
+            preflight_headers["Access-Control-Allow-Headers"] = requested_headers
+
+        response = PlainTextResponse("OK", status_code=200, headers=preflight_headers)
+        await response(scope, receive, _with_headers(send, extra_headers, True))
+
+
+def _with_headers(send: Send, extra_headers: list, vary_origin: bool = False) -> Send:
+    """
+    Wrap `send` to append headers to the response start message
+
+    With `vary_origin`, "Origin" is merged into an existing Vary header
+    instead of adding a second one.
+    """
+
+    async def wrapped(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = list(message.get("headers", []))
+            if vary_origin:
+                for i, (name, value) in enumerate(headers):
+                    if name.lower() == b"vary":
+                        headers[i] = (name, value + b", Origin")
+                        break
+                else:
+                    headers.append((b"vary", b"Origin"))
+            message["headers"] = headers + extra_headers
+        await send(message)
+
+    return wrapped
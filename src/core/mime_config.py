@@ -26,6 +26,13 @@ EVIDENCE_POLICIES = {
 }
 
 
+# Largest file any evidence type accepts
+MAX_UPLOAD_BYTES = max(p.max_size_mb for p in EVIDENCE_POLICIES.values()) * 1024 * 1024
+
+# Allowance for multipart boundaries and form fields around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
 def get_policy(evidence_type: str) -> MimePolicy:
     """Get policy for evidence type"""
     return EVIDENCE_POLICIES.get(
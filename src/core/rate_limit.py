@@ -1,108 +1,204 @@
 """
-Rate limiting middleware using token bucket algorithm
+Rate limiting using token bucket algorithm
 """
+import itertools
+import math
+import threading
 import time
-from collections import defaultdict
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Dict, Tuple
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Tuple
+
+from .config import settings
+
+# Checks between sweeps of idle buckets
+SWEEP_INTERVAL = 4096
+
+# A bucket untouched this long has refilled completely (the hour bucket is
+# the slowest), so dropping it is indistinguishable from keeping it
+_IDLE_SECONDS = 3600
+
+# Independently locked client maps; a power of two so a key's stripe is a mask
+LOCK_STRIPES = 64
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of one check, with the numbers the response headers need"""
+    allowed: bool
+    remaining_minute: int
+    remaining_hour: int
+    reset_seconds: int  # until the per-minute bucket is full again
+
+
+class _Stripe:
+    """One lock and the LRU-ordered buckets of the clients hashed to it"""
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # key -> (last_refill, tokens_minute, tokens_hour)
+        self.buckets: OrderedDict[str, Tuple[float, float, float]] = OrderedDict()
 
 
 class TokenBucket:
-    """Token bucket rate limiter"""
+    """
+    Token bucket rate limiter
+
+    Each client holds a per-minute and a per-hour bucket that refill
+    continuously, sharing one refill timestamp: three floats per client.
+    A request needs a token from both buckets.
+
+    Clients are spread over `stripes` independently locked maps by
+    hash(key), so checks for unrelated clients do not wait on each other
+    while each client's read-modify-write stays atomic: threads sharing
+    the limiter cannot both spend the same token.
+
+    At most `max_clients` buckets are kept across all stripes, counted
+    under a small lock of its own. Each stripe orders its buckets by
+    least-recent use; tracking a new client beyond the cap evicts the
+    stalest bucket of the client's own stripe (or, if that is empty, of
+    another stripe), and the evicted client starts again from full
+    buckets. Every SWEEP_INTERVAL checks, buckets idle long enough to be
+    full again are dropped from the stale end of every stripe.
+    """
 
-    def __init__(self, rate_per_minute: int, rate_per_hour: int):
+    def __init__(
+        self,
+        rate_per_minute: int,
+        rate_per_hour: int,
+        max_clients: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+        stripes: int = LOCK_STRIPES,
+    ):
+        if stripes < 1 or stripes & (stripes - 1):
+            raise ValueError(f"stripes must be a power of two, got {stripes}")
+        if rate_per_minute < 1 or rate_per_hour < 1:
+            raise ValueError(
+                f"rates must be positive, got {rate_per_minute}/min and {rate_per_hour}/hour"
+            )
+        if max_clients < 1:
+            raise ValueError(f"max_clients must be positive, got {max_clients}")
         self.rate_per_minute = rate_per_minute
         self.rate_per_hour = rate_per_hour
-        self.buckets: Dict[str, Tuple[float, int, float, int]] = defaultdict(
-            lambda: (time.time(), rate_per_minute, time.time(), rate_per_hour)
-        )
-
-    def consume(self, key: str) -> Tuple[bool, int, int]:
+        self.max_clients = max_clients
+        self._clock = clock
+        self._refill_minute = rate_per_minute / 60
+        self._refill_hour = rate_per_hour / 3600
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._stripe_mask = stripes - 1
+        # Buckets held across all stripes; guards the max_clients bound
+        self._count = 0
+        self._count_lock = threading.Lock()
+        # next() on a count is atomic under the GIL, so no lock is needed
+        self._checks = itertools.count(1)
+
+    @property
+    def buckets(self) -> dict[str, Tuple[float, float, float]]:
+        """Snapshot of all client buckets, stripe by stripe in LRU order"""
+        snapshot: dict[str, Tuple[float, float, float]] = {}
+        for stripe in self._stripes:
+            with stripe.lock:
+                snapshot.update(stripe.buckets)
+        return snapshot
+
+    def consume(self, key: str) -> RateLimitResult:
         """
         Try to consume a token
 
         Returns:
-            (allowed, remaining_minute, remaining_hour)
+            RateLimitResult(allowed, remaining_minute, remaining_hour, reset_seconds)
         """
-        now = time.time()
-        last_minute, tokens_minute, last_hour, tokens_hour = self.buckets[key]
-
-        # Refill minute bucket
-        elapsed_minute = now - last_minute
-        if elapsed_minute > 60:
-            tokens_minute = self.rate_per_minute
-            last_minute = now
-        else:
-            refill_minute = int((elapsed_minute / 60) * self.rate_per_minute)
-            tokens_minute = min(self.rate_per_minute, tokens_minute + refill_minute)
-
-        # Refill hour bucket
-        elapsed_hour = now - last_hour
-        if elapsed_hour > 3600:
-            tokens_hour = self.rate_per_hour
-            last_hour = now
-        else:
-            refill_hour = int((elapsed_hour / 3600) * self.rate_per_hour)
-            tokens_hour = min(self.rate_per_hour, tokens_hour + refill_hour)
-
-        # Check if we can consume
-        if tokens_minute > 0 and tokens_hour > 0:
-            tokens_minute -= 1
-            tokens_hour -= 1
-            self.buckets[key] = (last_minute, tokens_minute, last_hour, tokens_hour)
-            return True, tokens_minute, tokens_hour
-        else:
-            self.buckets[key] = (last_minute, tokens_minute, last_hour, tokens_hour)
-            return False, tokens_minute, tokens_hour
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """
-    Rate limiting middleware
-
-    Limits:
-    - 60 requests per minute per IP
-    - 1000 requests per hour per IP
-    """
-
-    def __init__(self, app, rate_per_minute: int = 60, rate_per_hour: int = 1000):
-        super().__init__(app)
-        self.limiter = TokenBucket(rate_per_minute, rate_per_hour)
-
-    async def dispatch(self, request: Request, call_next):
-        # Get client IP (handle proxy headers)
-        client_ip = request.headers.get("X-Forwarded-For", request.client.host).split(",")[0]
-
-        # Skip rate limiting for health check
-        if request.url.path in ["/health", "/"]:
-            return await call_next(request)
-
-        # Check rate limit
-        allowed, remaining_minute, remaining_hour = self.limiter.consume(client_ip)
-
-        if not allowed:
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "type": "https://permia.is/errors/rate-limit-exceeded",
-                    "title": "Rate Limit Exceeded",
-                    "status": 429,
-                    "detail": "Too many requests. Please try again later.",
-                },
-                headers={
-                    "X-RateLimit-Remaining-Minute": str(remaining_minute),
-                    "X-RateLimit-Remaining-Hour": str(remaining_hour),
-                    "Retry-After": "60",
-                },
-            )
-
-        # Process request
-        response = await call_next(request)
-
-        # Add rate limit headers
-        response.headers["X-RateLimit-Remaining-Minute"] = str(remaining_minute)
-        response.headers["X-RateLimit-Remaining-Hour"] = str(remaining_hour)
+        stripe = self._stripes[hash(key) & self._stripe_mask]
+        with stripe.lock:
+            now = self._clock()
+            buckets = stripe.buckets
+            bucket = buckets.get(key)
+            if bucket is None:
+                self._make_room(stripe)
+                tokens_minute = float(self.rate_per_minute)
+                tokens_hour = float(self.rate_per_hour)
+            else:
+                last, tokens_minute, tokens_hour = bucket
+                elapsed = now - last
+                tokens_minute = min(self.rate_per_minute, tokens_minute + elapsed * self._refill_minute)
+                tokens_hour = min(self.rate_per_hour, tokens_hour + elapsed * self._refill_hour)
+                buckets.move_to_end(key)
+
+            allowed = tokens_minute >= 1 and tokens_hour >= 1
+            if allowed:
+                tokens_minute -= 1
+                tokens_hour -= 1
+
+            buckets[key] = (now, tokens_minute, tokens_hour)
+
+        # Swept after releasing the stripe: one lock held at a time
+        if next(self._checks) % SWEEP_INTERVAL == 0:
+            self._sweep(now)
+
+        reset_seconds = math.ceil((self.rate_per_minute - tokens_minute) * 60 / self.rate_per_minute)
+        return RateLimitResult(allowed, int(tokens_minute), int(tokens_hour), reset_seconds)
+
+    def _make_room(self, stripe: _Stripe) -> None:
+        """
+        Account for one new bucket in `stripe`, evicting one if at the cap
 
-        return response
+        The caller holds stripe.lock. Other stripes are only try-locked, so
+        two threads evicting for each other cannot deadlock.
+        """
+        with self._count_lock:
+            if self._count < self.max_clients:
+                self._count += 1
+                return
+
+        if stripe.buckets:
+            stripe.buckets.popitem(last=False)
+            return
+
+        while True:
+            for other in self._stripes:
+                if other is stripe or not other.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if other.buckets:
+                        other.buckets.popitem(last=False)
+                        return
+                finally:
+                    other.lock.release()
+            # Every other stripe was empty or busy: take a slot freed meanwhile
+            with self._count_lock:
+                if self._count < self.max_clients:
+                    self._count += 1
+                    return
+
+    def _sweep(self, now: float) -> None:
+        """Drop idle buckets from every stripe"""
+        cutoff = now - _IDLE_SECONDS
+        for stripe in self._stripes:
+            with stripe.lock:
+                buckets = stripe.buckets
+                # LRU order: entries are oldest-first, so stop at the first recent one
+                dropped = 0
+                while buckets:
+                    key, (last, _, _) = next(iter(buckets.items()))
+                    if last >= cutoff:
+                        break
+                    del buckets[key]
+                    dropped += 1
+            if dropped:
+                with self._count_lock:
+                    self._count -= dropped
+
+    def reset_all(self) -> None:
+        """Forget all client buckets"""
+        for stripe in self._stripes:
+            with stripe.lock:
+                dropped = len(stripe.buckets)
+                stripe.buckets.clear()
+            with self._count_lock:
+                self._count -= dropped
+
+
+rate_limiter = TokenBucket(
+    settings.RATE_LIMIT_PER_MINUTE,
+    settings.RATE_LIMIT_PER_HOUR,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+)
@@ -62,6 +62,8 @@ class Evidence(Base):
         Index("ix_evidence_tenant_app", "tenant_id", "application_id"),
         Index("ix_evidence_app_created", "application_id", "created_at"),
         Index("ix_evidence_hash_created", "sha256_hash_server", "created_at"),
+        # Export query: equality on both keys, rows already in created_at order
+        Index("ix_evidence_app_tenant_created", "application_id", "tenant_id", "created_at"),
     )
 
     def __repr__(self) -> str:
@@ -141,7 +143,8 @@ class Export(Base):
     correlation_id = Column(String, nullable=False, index=True)
 
     __table_args__ = (
-        Index("ix_exports_tenant_app", "tenant_id", "application_id"),
+        # Export listing: tenant + application, optional status, newest first
+        Index("ix_exports_tenant_app_status_created", "tenant_id", "application_id", "status", "created_at"),
         Index("ix_exports_status_created", "status", "created_at"),
     )
 
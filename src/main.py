@@ -1,19 +1,20 @@
 """
 Permía Backend - Main Application
 """
+import importlib.util
 import logging
+import orjson
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 from sqlalchemy import text
 
 from .api import evidence, exports
 from .core.config import settings
 from .core.database import engine
-from .core.correlation import CorrelationIdMiddleware
-from .core.rate_limit import RateLimitMiddleware
+from .core.middleware import UnifiedMiddleware
+from .core.rate_limit import rate_limiter
 from .core.logging_config import setup_logging
 from .services.storage import storage_service
 
@@ -21,31 +22,21 @@ from .services.storage import storage_service
 setup_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-# Initialize Sentry if configured
-if settings.SENTRY_DSN:
-    try:
-        import sentry_sdk
-        sentry_sdk.init(
-            dsn=settings.SENTRY_DSN,
-            environment=settings.SENTRY_ENVIRONMENT,
-            traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
-        )
-        logger.info("Sentry monitoring initialized", extra={"correlation_id": "startup"})
-    except ImportError:
-        logger.warning("Sentry SDK not installed, monitoring disabled", extra={"correlation_id": "startup"})
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event handler for startup/shutdown"""
-    logger.info("=" * 80, extra={"correlation_id": "startup"})
-    logger.info("Permía Backend starting...", extra={"correlation_id": "startup"})
-    logger.info(f"Environment: {settings.ENVIRONMENT}", extra={"correlation_id": "startup"})
-    logger.info(f"Database: {settings.DATABASE_URL.split('@')[-1]}", extra={"correlation_id": "startup"})
-    logger.info(f"Auth Required: {settings.AUTH_REQUIRED}", extra={"correlation_id": "startup"})
-    logger.info(f"Rate Limiting: {settings.RATE_LIMIT_ENABLED}", extra={"correlation_id": "startup"})
-    logger.info(f"Export API: {settings.ENABLE_EXPORT_API}", extra={"correlation_id": "startup"})
-    logger.info("=" * 80, extra={"correlation_id": "startup"})
+    startup_info = {
+        "environment": settings.ENVIRONMENT,
+        "database_host": settings.DATABASE_URL.split("@")[-1],
+        "auth_required": settings.AUTH_REQUIRED,
+        "rate_limiting": settings.RATE_LIMIT_ENABLED,
+        "export_api": settings.ENABLE_EXPORT_API,
+    }
+    logger.info(
+        "Permía Backend starting",
+        extra={"correlation_id": "startup", "startup_info": startup_info},
+    )
 
     # Verify database connection
     try:
@@ -55,6 +46,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Database connection failed: {e}", extra={"correlation_id": "startup"})
 
+    # Initialize Sentry per worker process (after fork); skip the import when unused
+    if settings.SENTRY_DSN:
+        if importlib.util.find_spec("sentry_sdk") is not None:
+            import sentry_sdk
+            sentry_sdk.init(
+                dsn=settings.SENTRY_DSN,
+                environment=settings.SENTRY_ENVIRONMENT,
+                traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+            )
+            logger.info("Sentry monitoring initialized", extra={"correlation_id": "startup"})
+        else:
+            logger.warning("Sentry SDK not installed, monitoring disabled", extra={"correlation_id": "startup"})
+
     # Verify storage connection
     try:
         if storage_service.check_health():
@@ -68,13 +72,18 @@ async def lifespan(app: FastAPI):
     logger.info("Permía Backend shutting down...", extra={"correlation_id": "shutdown"})
 
 
+# No OpenAPI schema (and so no docs UIs) in production
+OPENAPI_ENABLED = settings.ENVIRONMENT != "production"
+DOCS_ENABLED = OPENAPI_ENABLED and settings.ENABLE_DOCS
+
 app = FastAPI(
     title=settings.API_TITLE,
     description=settings.API_DESCRIPTION,
     version="0.1.0",
     lifespan=lifespan,
-    docs_url="/docs" if settings.ENABLE_DOCS else None,
-    redoc_url="/redoc" if settings.ENABLE_REDOC else None,
+    openapi_url="/openapi.json" if OPENAPI_ENABLED else None,
+    docs_url="/docs" if DOCS_ENABLED else None,
+    redoc_url="/redoc" if OPENAPI_ENABLED and settings.ENABLE_REDOC else None,
 )
 
 
@@ -110,24 +119,24 @@ def custom_openapi():
     return app.openapi_schema
 
 
-app.openapi = custom_openapi
+if OPENAPI_ENABLED:
+    app.openapi = custom_openapi
 
-# Middleware (order matters!)
-if settings.RATE_LIMIT_ENABLED:
-    app.add_middleware(
-        RateLimitMiddleware,
-        rate_per_minute=settings.RATE_LIMIT_PER_MINUTE,
-        rate_per_hour=settings.RATE_LIMIT_PER_HOUR,
-    )
+# Constant bodies for / and /livez: every value comes from settings, so encode once
+_ROOT_BODY = orjson.dumps({
+    "service": settings.API_TITLE,
+    "version": "0.1.0",
+    "environment": settings.ENVIRONMENT,
+    "docs": "/docs" if DOCS_ENABLED else None,
+    "health": "/health",
+})
+_LIVEZ_BODY = orjson.dumps({"status": "alive"})
 
-app.add_middleware(CorrelationIdMiddleware)
+# Middleware: CORS, correlation ID and rate limiting in a single ASGI layer
 app.add_middleware(
-    CORSMiddleware,
+    UnifiedMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["X-Correlation-Id", "X-RateLimit-Remaining-Minute", "X-RateLimit-Remaining-Hour"],
+    limiter=rate_limiter if settings.RATE_LIMIT_ENABLED else None,
 )
 
 # Include routers
@@ -145,8 +154,10 @@ if settings.ENABLE_EXPORT_API:
     )
 
 
+# Plain `def`: the DB ping and storage check are blocking calls, so Starlette
+# runs this handler in its threadpool instead of stalling the event loop.
 @app.get("/health", tags=["System"])
-async def health_check():
+def health_check():
     """
     Health check with DB and storage verification
 
@@ -186,13 +197,18 @@ async def health_check():
     return JSONResponse(content=health, status_code=status_code)
 
 
+@app.get("/livez", tags=["System"])
+async def liveness() -> Response:
+    """
+    Liveness probe
+
+    Only confirms the process is serving requests; use /health for
+    dependency checks.
+    """
+    return Response(_LIVEZ_BODY, media_type="application/json")
+
+
 @app.get("/", tags=["System"])
-async def root():
+async def root() -> Response:
     """Root endpoint"""
-    return {
-        "service": settings.API_TITLE,
-        "version": "0.1.0",
-        "environment": settings.ENVIRONMENT,
-        "docs": "/docs" if settings.ENABLE_DOCS else None,
-        "health": "/health",
-    }
+    return Response(_ROOT_BODY, media_type="application/json")
@@ -0,0 +1,20 @@
+"""Internal evaluation payloads (typed dicts, no model overhead)"""
+from typing import TypedDict
+
+
+class RuleOutcome(TypedDict):
+    """Outcome of a single rule"""
+
+    rule_id: str
+    rule_name: str
+    outcome: str
+    message: str
+
+
+class EvaluationResult(TypedDict):
+    """Result of evaluating all rules for an application"""
+
+    application_id: str
+    overall_outcome: str
+    rule_outcomes: list[RuleOutcome]
+    message: str
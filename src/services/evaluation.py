@@ -1,5 +1,30 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
+from ..schemas.evaluation import EvaluationResult
+
+# Rule evaluation is CPU-bound; run it in worker processes, off the event loop.
+# Workers are only spawned on first submit.
+_RULE_EXECUTOR = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+def _evaluate_sync(application_id: str, facts: dict[str, Any]) -> EvaluationResult:
+    """
+    Evaluate rules for an application (runs in a worker process)
+
+    Module-level so it can be pickled for the process pool.
+    """
+    # TODO: Implement actual rule evaluation logic
+    # For Phase 1, this is a placeholder
+    return EvaluationResult(
+        application_id=application_id,
+        overall_outcome="PENDING",
+        rule_outcomes=[],
+        message="Rule evaluation not yet implemented in Phase 1",
+    )
+
 
 class EvaluationEngine:
     """Rule evaluation engine for permit decisions"""
@@ -7,7 +32,7 @@ class EvaluationEngine:
     def __init__(self):
         self.rules: dict[str, Any] = {}
 
-    async def evaluate(self, application_id: str, facts: dict[str, Any]) -> dict[str, Any]:
+    async def evaluate(self, application_id: str, facts: dict[str, Any]) -> EvaluationResult:
         """
         Evaluate rules for an application
 
@@ -18,14 +43,8 @@ class EvaluationEngine:
         Returns:
             Evaluation result with outcomes
         """
-        # TODO: Implement actual rule evaluation logic
-        # For Phase 1, this is a placeholder
-        return {
-            "application_id": application_id,
-            "overall_outcome": "PENDING",
-            "rule_outcomes": [],
-            "message": "Rule evaluation not yet implemented in Phase 1",
-        }
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_RULE_EXECUTOR, _evaluate_sync, application_id, facts)
 
 
 # Singleton instance
@@ -1,18 +1,43 @@
 from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
 import piexif
 import io
+import logging
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
+
+from .ingest import HEAD_SIZE, find_jpeg_app1
+
+logger = logging.getLogger(__name__)
+
+# GPS refs that make a coordinate negative
+_NEG_REFS = frozenset({b"S", b"W", "S", "W"})
+
+
+def _parse_exif_datetime(value: str) -> datetime:
+    """
+    Parse an EXIF "YYYY:MM:DD HH:MM:SS" timestamp (naive, like strptime)
+
+    Slices the fixed-width fields directly instead of running strptime's
+    format parser. Raises ValueError on malformed input.
+    """
+    if len(value) != 19:
+        raise ValueError(f"Invalid EXIF datetime: {value!r}")
+    return datetime(
+        int(value[0:4]), int(value[5:7]), int(value[8:10]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19]),
+    )
 
 
 class ExifExtractor:
     """Extract and validate EXIF metadata from images"""
 
-    def extract(self, file_bytes: bytes) -> dict:
+    def extract(self, file_bytes: Union[bytes, memoryview], *, include_raw: bool = False) -> dict:
         """
         Extract EXIF data from image bytes
 
+        JPEGs are handled from the leading bytes alone (see extract_head);
+        PIL is only used for other formats or unusual JPEG layouts.
+
         Returns dict with:
         - has_exif: bool
         - gps_latitude: float | None
@@ -20,7 +45,18 @@ class ExifExtractor:
         - datetime: datetime | None
         - camera_make: str | None
         - camera_model: str | None
-        - raw: dict (all EXIF tags)
+        - raw: dict (all EXIF tags, only when include_raw)
+        """
+        result = self.extract_head(bytes(file_bytes[:HEAD_SIZE]), include_raw=include_raw)
+        if result is not None:
+            return result
+        return self._extract_decoded(file_bytes, include_raw)
+
+    def _extract_decoded(self, file_bytes: Union[bytes, memoryview], include_raw: bool = False) -> dict:
+        """
+        Extract EXIF data by opening the whole file with PIL
+
+        For callers whose extract_head() already came back empty.
         """
         try:
             img = Image.open(io.BytesIO(file_bytes))
@@ -29,93 +65,114 @@ class ExifExtractor:
             if not exif_bytes:
                 return {"has_exif": False}
 
-            exif_dict = piexif.load(exif_bytes)
+            return self._parse(exif_bytes, include_raw)
 
-            result = {
-                "has_exif": True,
-                "gps_latitude": None,
-                "gps_longitude": None,
-                "datetime": None,
-                "camera_make": None,
-                "camera_model": None,
-                "raw": {},
-            }
+        except Exception as e:
+            logger.warning(f"EXIF extraction failed: {e}")
+            return {"has_exif": False, "error": str(e)}
 
-            # Extract GPS
-            if "GPS" in exif_dict and exif_dict["GPS"]:
-                gps_data = exif_dict["GPS"]
-                result["gps_latitude"] = self._get_decimal_coords(
-                    gps_data.get(piexif.GPSIFD.GPSLatitude),
-                    gps_data.get(piexif.GPSIFD.GPSLatitudeRef),
-                )
-                result["gps_longitude"] = self._get_decimal_coords(
-                    gps_data.get(piexif.GPSIFD.GPSLongitude),
-                    gps_data.get(piexif.GPSIFD.GPSLongitudeRef),
-                )
-
-            # Extract datetime
-            if "Exif" in exif_dict and exif_dict["Exif"]:
-                dt_original = exif_dict["Exif"].get(piexif.ExifIFD.DateTimeOriginal)
-                if dt_original:
-                    try:
-                        dt_str = dt_original.decode("utf-8")
-                        result["datetime"] = datetime.strptime(dt_str, "%Y:%m:%d %H:%M:%S")
-                    except:
-                        pass
-
-            # Extract camera info
-            if "0th" in exif_dict and exif_dict["0th"]:
-                make = exif_dict["0th"].get(piexif.ImageIFD.Make)
-                model = exif_dict["0th"].get(piexif.ImageIFD.Model)
-                if make:
-                    result["camera_make"] = make.decode("utf-8") if isinstance(make, bytes) else make
-                if model:
-                    result["camera_model"] = model.decode("utf-8") if isinstance(model, bytes) else model
-
-            # Store raw for audit
-            result["raw"] = self._serialize_exif(exif_dict)
+    def extract_head(self, head_bytes: bytes, *, include_raw: bool = False) -> Optional[dict]:
+        """
+        Extract EXIF data from the first bytes of a JPEG, without PIL
 
-            return result
+        Returns None when the head holds no complete EXIF APP1 segment,
+        in which case the caller falls back to decoding the full file.
+        """
+        app1 = find_jpeg_app1(head_bytes)
+        if app1 is None:
+            return None
+        return self.extract_from_app1(app1, include_raw=include_raw)
+
+    def extract_from_app1(self, app1_bytes: Optional[bytes], *, include_raw: bool = False) -> dict:
+        """
+        Extract EXIF data from a JPEG APP1 payload ("Exif\\0\\0...")
 
+        Same result shape as extract(), without decoding the image.
+        """
+        if not app1_bytes:
+            return {"has_exif": False}
+
+        try:
+            return self._parse(app1_bytes, include_raw)
         except Exception as e:
-            print(f"EXIF extraction failed: {e}")
+            logger.warning(f"EXIF extraction failed: {e}")
             return {"has_exif": False, "error": str(e)}
 
+    def _parse(self, exif_bytes: bytes, include_raw: bool = False) -> dict:
+        """Parse raw EXIF bytes into the extract() result dict"""
+        exif_dict = piexif.load(exif_bytes)
+
+        result = {
+            "has_exif": True,
+            "gps_latitude": None,
+            "gps_longitude": None,
+            "datetime": None,
+            "camera_make": None,
+            "camera_model": None,
+        }
+
+        # Extract GPS
+        if "GPS" in exif_dict and exif_dict["GPS"]:
+            gps_data = exif_dict["GPS"]
+            result["gps_latitude"] = self._get_decimal_coords(
+                gps_data.get(piexif.GPSIFD.GPSLatitude),
+                gps_data.get(piexif.GPSIFD.GPSLatitudeRef),
+            )
+            result["gps_longitude"] = self._get_decimal_coords(
+                gps_data.get(piexif.GPSIFD.GPSLongitude),
+                gps_data.get(piexif.GPSIFD.GPSLongitudeRef),
+            )
+
+        # Extract datetime
+        if "Exif" in exif_dict and exif_dict["Exif"]:
+            dt_original = exif_dict["Exif"].get(piexif.ExifIFD.DateTimeOriginal)
+            if dt_original:
+                try:
+                    dt_str = dt_original.decode("utf-8")
+                    result["datetime"] = _parse_exif_datetime(dt_str)
+                except:
+                    pass
+
+        # Extract camera info
+        if "0th" in exif_dict and exif_dict["0th"]:
+            make = exif_dict["0th"].get(piexif.ImageIFD.Make)
+            model = exif_dict["0th"].get(piexif.ImageIFD.Model)
+            if make:
+                result["camera_make"] = make.decode("utf-8") if isinstance(make, bytes) else make
+            if model:
+                result["camera_model"] = model.decode("utf-8") if isinstance(model, bytes) else model
+
+        # Store raw for audit
+        if include_raw:
+            result["raw"] = self._serialize_exif(exif_dict)
+
+        return result
+
     def _get_decimal_coords(self, coords, ref) -> Optional[float]:
         """Convert GPS coordinates to decimal degrees"""
         if not coords or not ref:
             return None
 
         try:
-            degrees = coords[0][0] / coords[0][1]
-            minutes = coords[1][0] / coords[1][1]
-            seconds = coords[2][0] / coords[2][1]
-
-            decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
-
-            if ref in [b"S", b"W", "S", "W"]:
-                decimal = -decimal
-
-            return decimal
+            decimal = (
+                coords[0][0] / coords[0][1]
+                + coords[1][0] / coords[1][1] / 60.0
+                + coords[2][0] / coords[2][1] / 3600.0
+            )
+            return -decimal if ref in _NEG_REFS else decimal
         except:
             return None
 
     def _serialize_exif(self, exif_dict: dict) -> dict:
         """Convert EXIF dict to JSON-serializable format"""
-        result = {}
-        for ifd in exif_dict:
-            if isinstance(exif_dict[ifd], dict):
-                result[ifd] = {}
-                for tag in exif_dict[ifd]:
-                    value = exif_dict[ifd][tag]
-                    if isinstance(value, bytes):
-                        try:
-                            result[ifd][tag] = value.decode("utf-8")
-                        except:
-                            result[ifd][tag] = str(value)
-                    else:
-                        result[ifd][tag] = str(value)
-        return result
+        return {
+            ifd: {
+                tag: value.decode("utf-8", "replace") if isinstance(value, (bytes, bytearray)) else str(value)
+                for tag, value in tags.items()
+            }
+            for ifd, tags in exif_dict.items()
+            if isinstance(tags, dict)
+        }
 
 
 # Singleton
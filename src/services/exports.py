@@ -1,23 +1,78 @@
 """
 Export service for creating and signing evidence packages
 """
-import io
+import base64
+import hashlib
+import itertools
 import zipfile
-import json
 import logging
-from jose import jwt
-from datetime import datetime, timezone, timedelta
+import orjson
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, Union
 from sqlalchemy.orm import Session
 
 from ..core.config import settings
-from ..db.models import Evidence, Export
+from ..db.models import Evidence
 from .storage import storage_service
 
 
 logger = logging.getLogger(__name__)
 
+# Optional: SIMD-accelerated DEFLATE (zlib-ng), output-compatible with zlib.
+# zipfile looks up zlib.compressobj at write time, so swapping the module is enough.
+try:
+    from zlib_ng import zlib_ng
+
+    zipfile.zlib = zlib_ng  # type: ignore[attr-defined]
+except ImportError:
+    pass
+
+# Evidence rows fetched per round trip while streaming the export query
+EXPORT_QUERY_BATCH_SIZE = 500
+
+# Concurrent blob downloads per export (IO-bound; the Azure client is thread-safe)
+EXPORT_DOWNLOAD_WORKERS = 16
+
+# Already entropy-coded formats: DEFLATE costs CPU for no size gain, store as-is
+STORED_MIME_TYPES = frozenset({
+    "image/jpeg",
+    "image/png",
+    "image/heic",
+    "video/mp4",
+    "video/quicktime",
+})
+
+# File extension per evidence MIME type
+MIME_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/heic": ".heic",
+    "video/mp4": ".mp4",
+    "video/quicktime": ".mov",
+    "application/pdf": ".pdf",
+}
+
+# ZIP packages stay in memory up to this size, then spill to a temp file
+EXPORT_SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+
+def _b64url(data: bytes) -> str:
+    """Unpadded base64url, as used in JWS compact serialization"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+# JWS protected headers for manifest signatures (compact JWS, verifiable with any JWT library)
+_JWS_HEADER_RS256_B64 = _b64url(orjson.dumps({"alg": "RS256", "typ": "JWT"}))
+_JWS_HEADER_EDDSA_B64 = _b64url(orjson.dumps({"alg": "EdDSA", "typ": "JWT"}))
+
 
 class ExportService:
     """Service for creating signed export packages"""
@@ -25,9 +80,16 @@ class ExportService:
     def __init__(self):
         self.private_key = self._load_private_key()
         self.public_key = self._load_public_key()
+        # Parsed once: per-signature PEM parsing / key setup dominates short JWS payloads
+        # RSA keys sign RS256; Ed25519 keys sign EdDSA (much cheaper to sign)
+        self._signing_key: Optional[Union[RSAPrivateKey, Ed25519PrivateKey]] = None
+        if self.private_key != "STUB_PRIVATE_KEY":
+            self._signing_key = serialization.load_pem_private_key(
+                self.private_key.encode(), password=None
+            )
 
     def _load_private_key(self) -> str:
-        """Load RSA private key for signing"""
+        """Load RSA or Ed25519 private key for signing"""
         key_path = Path(settings.EXPORT_PRIVATE_KEY_PATH)
         if key_path.exists():
             return key_path.read_text()
@@ -36,7 +98,7 @@ class ExportService:
             return "STUB_PRIVATE_KEY"
 
     def _load_public_key(self) -> str:
-        """Load RSA public key for verification"""
+        """Load RSA or Ed25519 public key for verification"""
         key_path = Path(settings.EXPORT_PUBLIC_KEY_PATH)
         if key_path.exists():
             return key_path.read_text()
@@ -51,10 +113,14 @@ class ExportService:
         tenant_id: str,
         include_metadata: bool = True,
         sign_package: bool = True,
-    ) -> Tuple[bytes, int, Optional[str]]:
+    ) -> Tuple[BinaryIO, int, int, Optional[str]]:
         """
         Create a ZIP export package with evidence files
 
+        The package is written to a SpooledTemporaryFile, so memory stays
+        bounded for large exports. The caller owns (and must close) the
+        returned file object, which is positioned at the start.
+
         Args:
             db: Database session
             export_id: Export ID
@@ -64,47 +130,69 @@ class ExportService:
             sign_package: Sign the manifest
 
         Returns:
-            Tuple of (zip_bytes, file_count, signature)
+            Tuple of (zip_file, zip_size_bytes, file_count, signature)
         """
-        # Get all evidence for application (tenant-scoped)
-        evidence_list = (
+        # Stream evidence for application (tenant-scoped), in upload order
+        evidence_rows = iter(
             db.query(Evidence)
             .filter(
                 Evidence.application_id == application_id,
                 Evidence.tenant_id == tenant_id,
             )
             .order_by(Evidence.created_at)
-            .all()
+            .yield_per(EXPORT_QUERY_BATCH_SIZE)
         )
 
-        if not evidence_list:
+        first = next(evidence_rows, None)
+        if first is None:
             raise ValueError(f"No evidence found for application {application_id}")
 
-        # Create ZIP in memory
-        zip_buffer = io.BytesIO()
+        # One pass over the rows feeds both the downloader and the ZIP writer;
+        # tee only buffers the download read-ahead window
+        download_rows, evidence_rows = itertools.tee(itertools.chain([first], evidence_rows))
+        file_count = 0
+
+        # Create ZIP in a spooled temp file (memory first, disk past the threshold)
+        zip_buffer = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
 
         with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
             # Add README
             readme_content = self._generate_readme(application_id, export_id)
             zip_file.writestr("README.txt", readme_content)
 
-            # Add each evidence file
-            evidence_metadata = []
-            for idx, evidence in enumerate(evidence_list, 1):
-                try:
-                    # Download from blob storage
-                    blob_client = storage_service.client.get_blob_client(
-                        container=storage_service.container_name,
-                        blob=evidence.storage_path,
-                    )
-                    file_bytes = blob_client.download_blob().readall()
+            # Download evidence files concurrently, in order, with bounded read-ahead
+            with ThreadPoolExecutor(max_workers=EXPORT_DOWNLOAD_WORKERS) as executor:
+                downloads = self._download_in_order(
+                    executor,
+                    ((evidence.storage_path, evidence.sha256_hash_server) for evidence in download_rows),
+                )
+
+                # Add each evidence file (zipfile is not thread-safe: write serially)
+                evidence_metadata = []
+                for idx, (evidence, download) in enumerate(zip(evidence_rows, downloads), 1):
+                    file_count = idx
+                    file_bytes, hash_verified, error = download
+                    if error is not None:
+                        logger.error(f"Failed to add evidence {evidence.evidence_id}: {error}")
+                        # Continue with other files
+                        continue
+
+                    if not hash_verified:
+                        logger.warning(
+                            f"Evidence {evidence.evidence_id} content does not match stored SHA-256"
+                        )
 
                     # Determine file extension from MIME type
                     ext = self._get_extension_from_mime(evidence.mime_type)
                     filename = f"evidence/{idx:03d}_{evidence.evidence_id}{ext}"
 
-                    # Add to ZIP
-                    zip_file.writestr(filename, file_bytes)
+                    # Add to ZIP (stored for pre-compressed media, deflated otherwise)
+                    compress_type = (
+                        zipfile.ZIP_STORED
+                        if evidence.mime_type in STORED_MIME_TYPES
+                        else zipfile.ZIP_DEFLATED
+                    )
+                    zip_file.writestr(filename, file_bytes, compress_type=compress_type)
 
                     # Collect metadata
                     evidence_metadata.append({
@@ -114,22 +202,19 @@ class ExportService:
                         "mime_type": evidence.mime_type,
                         "file_size_bytes": evidence.file_size_bytes,
                         "sha256_hash": evidence.sha256_hash_server,
-                        "captured_at": evidence.captured_at_device.isoformat(),
+                        "hash_verified": hash_verified,
+                        "captured_at": evidence.captured_at_device,
                         "gps_latitude": evidence.gps_latitude,
                         "gps_longitude": evidence.gps_longitude,
                         "integrity_passed": evidence.integrity_passed,
                         "uploader_role": evidence.uploader_role,
                     })
 
-                except Exception as e:
-                    logger.error(f"Failed to add evidence {evidence.evidence_id}: {e}")
-                    # Continue with other files
-
             # Generate manifest
             manifest = {
                 "export_id": export_id,
                 "application_id": application_id,
-                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "generated_at": datetime.now(timezone.utc),
                 "evidence_count": len(evidence_metadata),
                 "evidence": evidence_metadata,
             }
@@ -142,14 +227,62 @@ class ExportService:
 
             # Add manifest
             if include_metadata:
-                zip_file.writestr("manifest.json", json.dumps(manifest, indent=2))
+                zip_file.writestr("manifest.json", orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
 
             # Add public key for verification
             if sign_package and self.public_key != "STUB_PUBLIC_KEY":
                 zip_file.writestr("public_key.pem", self.public_key)
 
-        zip_bytes = zip_buffer.getvalue()
-        return zip_bytes, len(evidence_list), signature
+        zip_size = zip_buffer.tell()
+        zip_buffer.seek(0)
+        return zip_buffer, zip_size, file_count, signature
+
+    def _download_in_order(
+        self,
+        executor: ThreadPoolExecutor,
+        blobs: Iterable[Tuple[str, Optional[str]]],
+    ) -> Iterator[Tuple[Optional[bytes], bool, Optional[Exception]]]:
+        """
+        Yield _download_one results in input order
+
+        Unlike executor.map, at most 2x the worker count downloads are in
+        flight or buffered at once, so memory does not grow with the export.
+        """
+        pending: deque = deque()
+        for blob_path, expected_sha256 in blobs:
+            pending.append(executor.submit(self._download_one, blob_path, expected_sha256))
+            if len(pending) >= 2 * EXPORT_DOWNLOAD_WORKERS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _download_one(
+        self,
+        blob_path: str,
+        expected_sha256: Optional[str],
+    ) -> Tuple[Optional[bytes], bool, Optional[Exception]]:
+        """
+        Download one evidence blob and verify its SHA-256 (runs in a worker thread)
+
+        Hashing happens chunk by chunk as data arrives, so verification adds
+        no extra pass over the bytes.
+
+        Returns (bytes, hash_verified, None) on success or (None, False, error)
+        so one failed download does not abort the export.
+        """
+        try:
+            blob_client = storage_service.client.get_blob_client(
+                container=storage_service.container_name,
+                blob=blob_path,
+            )
+            hasher = hashlib.sha256()
+            chunks = []
+            for chunk in blob_client.download_blob().chunks():
+                hasher.update(chunk)
+                chunks.append(chunk)
+            return b"".join(chunks), hasher.hexdigest() == expected_sha256, None
+        except Exception as e:
+            return None, False, e
 
     def _generate_readme(self, application_id: str, export_id: str) -> str:
         """Generate README for export package"""
@@ -166,13 +299,13 @@ Contents:
 ---------
 - evidence/          Evidence files (numbered by upload order)
 - manifest.json      Detailed metadata for all evidence
-- signature.txt      Digital signature (RS256) of the manifest
+- signature.txt      Digital signature (JWS, RS256 or EdDSA) of the manifest
 - public_key.pem     Public key for signature verification
 - README.txt         This file
 
 Verification:
 -------------
-The manifest.json file is digitally signed using RSA-4096.
+The manifest.json file is digitally signed using RSA-4096 or Ed25519.
 You can verify the signature using the included public_key.pem.
 
 For verification instructions, see: https://docs.permia.is/exports/verification
@@ -183,19 +316,11 @@ Generated by Permía (https://permia.is)
 
     def _get_extension_from_mime(self, mime_type: str) -> str:
         """Get file extension from MIME type"""
-        mime_map = {
-            "image/jpeg": ".jpg",
-            "image/png": ".png",
-            "image/heic": ".heic",
-            "video/mp4": ".mp4",
-            "video/quicktime": ".mov",
-            "application/pdf": ".pdf",
-        }
-        return mime_map.get(mime_type, ".bin")
+        return MIME_EXTENSIONS.get(mime_type, ".bin")
 
     def _sign_manifest(self, manifest: dict) -> str:
         """
-        Sign export manifest with RS256
+        Sign export manifest (RS256, or EdDSA for an Ed25519 key)
 
         Args:
             manifest: Export manifest dictionary
@@ -205,16 +330,25 @@ Generated by Permía (https://permia.is)
         """
         payload = {
             **manifest,
-            "signed_at": datetime.now(timezone.utc).isoformat(),
+            "signed_at": datetime.now(timezone.utc),
             "issuer": "permia.is",
         }
 
-        if self.private_key == "STUB_PRIVATE_KEY":
+        if self._signing_key is None:
             # Dev mode: return unsigned JSON
-            return f"UNSIGNED_DEV_MODE:{json.dumps(payload)}"
+            return f"UNSIGNED_DEV_MODE:{orjson.dumps(payload).decode()}"
 
-        # Production: sign with RSA
-        return jwt.encode(payload, self.private_key, algorithm="RS256")
+        # Production: JWS with the pre-parsed key
+        payload_b64 = _b64url(orjson.dumps(payload))
+        if isinstance(self._signing_key, Ed25519PrivateKey):
+            signing_input = f"{_JWS_HEADER_EDDSA_B64}.{payload_b64}"
+            signature = self._signing_key.sign(signing_input.encode("ascii"))
+        else:
+            signing_input = f"{_JWS_HEADER_RS256_B64}.{payload_b64}"
+            signature = self._signing_key.sign(
+                signing_input.encode("ascii"), padding.PKCS1v15(), hashes.SHA256()
+            )
+        return f"{signing_input}.{_b64url(signature)}"
 
 
 # Singleton
@@ -0,0 +1,124 @@
+"""
+Single-pass upload ingest: SHA-256, size, MIME sniff head and JPEG EXIF segment
+"""
+import hashlib
+from typing import BinaryIO, Optional
+
+import magic
+
+# Read/hash chunk size: large enough that hashlib releases the GIL for each update
+HASH_CHUNK_SIZE = 256 * 1024
+
+# Leading bytes handed to libmagic; every allowed evidence format is
+# identified by its header
+MIME_SNIFF_BYTES = 4096
+
+# Bytes kept from the start of the file for MIME sniffing and EXIF lookup.
+# An APP1 segment is at most 64 KiB and sits right after SOI (or APP0).
+HEAD_SIZE = 128 * 1024
+
+_JPEG_SOI = b"\xff\xd8"
+_EXIF_HEADER = b"Exif\x00\x00"
+# Markers without a length field
+_STANDALONE_MARKERS = frozenset({0x01, *range(0xD0, 0xD9)})
+_APP1 = 0xE1
+_SOS = 0xDA
+
+# One libmagic handle for the process: loads the compiled database once
+_MIME_MAGIC = magic.Magic(mime=True)
+
+
+class IngestAccumulator:
+    """
+    Accumulates an upload chunk by chunk
+
+    Every chunk goes through the hash once; only the first HEAD_SIZE bytes
+    are retained separately for MIME sniffing and EXIF parsing.
+    """
+
+    def __init__(self):
+        self._hasher = hashlib.sha256()
+        self._head = bytearray()
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self._hasher.update(chunk)
+        if len(self._head) < HEAD_SIZE:
+            self._head += chunk[:HEAD_SIZE - len(self._head)]
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+
+    @property
+    def head(self) -> bytes:
+        return bytes(self._head)
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def ingest(fp: BinaryIO) -> IngestAccumulator:
+    """Read a binary file object to the end in one pass"""
+    acc = IngestAccumulator()
+    for chunk in iter(lambda: fp.read(HASH_CHUNK_SIZE), b""):
+        acc.feed(chunk)
+    return acc
+
+
+def hash_stream(fp: BinaryIO) -> str:
+    """SHA-256 hex digest of a binary file object, read in HASH_CHUNK_SIZE chunks"""
+    hasher = hashlib.sha256()
+    for chunk in iter(lambda: fp.read(HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def sniff_mime(data: bytes, full: bool = False) -> str:
+    """
+    Detect MIME type from the leading bytes of a file
+
+    Only the first MIME_SNIFF_BYTES are inspected unless `full` is set,
+    in which case libmagic sees all of `data` (catches some polyglots).
+    """
+    return _MIME_MAGIC.from_buffer(data if full else data[:MIME_SNIFF_BYTES])
+
+
+def find_jpeg_app1(head: bytes) -> Optional[bytes]:
+    """
+    Return the EXIF APP1 payload ("Exif\\0\\0..."), or None
+
+    Walks JPEG marker segments until start-of-scan. Returns None for
+    non-JPEG data, when there is no EXIF segment, or when the segment is
+    not fully contained in `head`.
+    """
+    if head[:2] != _JPEG_SOI:
+        return None
+
+    pos = 2
+    end = len(head)
+    while pos + 4 <= end:
+        if head[pos] != 0xFF:
+            return None
+        marker = head[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in _STANDALONE_MARKERS:
+            pos += 2
+            continue
+        if marker == _SOS:
+            return None
+
+        length = int.from_bytes(head[pos + 2:pos + 4], "big")
+        segment_end = pos + 2 + length
+        if marker == _APP1 and head[pos + 4:pos + 10] == _EXIF_HEADER:
+            if segment_end > end:
+                return None
+            return head[pos + 4:segment_end]
+        pos = segment_end
+
+    return None
@@ -1,8 +1,26 @@
+import math
 from datetime import datetime, timezone
-import magic
+from typing import BinaryIO, Optional
 from ..schemas.evidence import EvidenceUploadRequest, IntegrityCheckResult
 from ..core.config import settings
 from ..core.mime_config import get_policy
+from .ingest import MIME_SNIFF_BYTES, hash_stream, sniff_mime
+
+# Max distance between EXIF and declared GPS positions (~0.001 deg of latitude)
+GPS_MISMATCH_TOLERANCE_METERS = 100.0
+
+_EARTH_RADIUS_METERS = 6_371_008.8
+
+
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two WGS84 points"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
 
 
 class IntegrityService:
@@ -11,14 +29,20 @@ class IntegrityService:
     def validate(
         self,
         evidence: EvidenceUploadRequest,
-        server_hash: str,
+        file_stream: BinaryIO,
         file_size: int,
-        file_bytes: bytes,
         exif_data: dict,
+        server_hash: Optional[str] = None,
+        detected_mime: Optional[str] = None,
     ) -> tuple[IntegrityCheckResult, str]:
         """
         Validate evidence integrity
 
+        `server_hash` and `detected_mime` may be passed in when the caller
+        already computed them during ingest; otherwise the hash is streamed
+        from `file_stream` and the MIME type sniffed from its head. The
+        stream is only read when one of them is missing.
+
         Returns:
             (IntegrityCheckResult, detected_mime)
         """
@@ -27,7 +51,15 @@ class IntegrityService:
         # Get policy for evidence type
         policy = get_policy(evidence.evidence_type.value)
 
+        # Device timestamp as aware UTC, shared by the EXIF and drift checks
+        device_time = evidence.captured_at_device
+        if device_time.tzinfo is None:
+            device_time = device_time.replace(tzinfo=timezone.utc)
+
         # 1. Hash verification
+        if server_hash is None:
+            file_stream.seek(0)
+            server_hash = hash_stream(file_stream)
         hash_match = evidence.sha256_hash_device == server_hash
         if not hash_match:
             issues.append(
@@ -36,7 +68,12 @@ class IntegrityService:
             )
 
         # 2. MIME type validation (server-sniffed vs policy)
-        detected_mime = magic.from_buffer(file_bytes, mime=True)
+        if detected_mime is None:
+            file_stream.seek(0)
+            if settings.MIME_SNIFF_FULL_FILE:
+                detected_mime = sniff_mime(file_stream.read(), full=True)
+            else:
+                detected_mime = sniff_mime(file_stream.read(MIME_SNIFF_BYTES))
         mime_valid = detected_mime in policy.allowed_mimes
 
         if not mime_valid:
@@ -79,10 +116,14 @@ class IntegrityService:
                 exif_gps_lon = exif_data.get("gps_longitude")
 
                 if exif_gps_lat is not None and exif_gps_lon is not None:
-                    gps_diff_lat = abs(exif_gps_lat - evidence.gps_coordinates.latitude)
-                    gps_diff_lon = abs(exif_gps_lon - evidence.gps_coordinates.longitude)
-
-                    if gps_diff_lat > 0.001 or gps_diff_lon > 0.001:
+                    gps_distance = _haversine_m(
+                        exif_gps_lat,
+                        exif_gps_lon,
+                        evidence.gps_coordinates.latitude,
+                        evidence.gps_coordinates.longitude,
+                    )
+
+                    if gps_distance > GPS_MISMATCH_TOLERANCE_METERS:
                         issues.append(
                             f"GPS mismatch: EXIF ({exif_gps_lat:.6f}, {exif_gps_lon:.6f}) "
                             f"vs declared ({evidence.gps_coordinates.latitude:.6f}, "
@@ -92,10 +133,7 @@ class IntegrityService:
                 # Cross-check datetime
                 exif_dt = exif_data.get("datetime")
                 if exif_dt:
-                    device_time = evidence.captured_at_device
-                    if device_time.tzinfo is None:
-                        device_time = device_time.replace(tzinfo=timezone.utc)
-                    elif exif_dt.tzinfo is None:
+                    if exif_dt.tzinfo is None:
                         exif_dt = exif_dt.replace(tzinfo=timezone.utc)
 
                     time_diff = abs((exif_dt - device_time).total_seconds())
@@ -116,10 +154,6 @@ class IntegrityService:
 
         # 6. Time drift check
         server_time = datetime.now(timezone.utc)
-        device_time = evidence.captured_at_device
-        if device_time.tzinfo is None:
-            device_time = device_time.replace(tzinfo=timezone.utc)
-
         time_drift_seconds = abs((server_time - device_time).total_seconds())
         time_drift_ok = time_drift_seconds <= settings.MAX_TIME_DRIFT_SECONDS
 
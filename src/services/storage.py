@@ -1,8 +1,15 @@
+import functools
 import hashlib
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timezone
+from typing import BinaryIO
 from azure.storage.blob import BlobServiceClient, ContentSettings, generate_blob_sas, BlobSasPermissions
-from azure.core.exceptions import AzureError
+from azure.core.exceptions import AzureError, ResourceExistsError
 from ..core.config import settings
+from .ingest import HASH_CHUNK_SIZE
+
+# SAS expiries are rounded up to this boundary so tokens can be reused
+SAS_EXPIRY_BUCKET_SECONDS = 300
 
 
 class StorageService:
@@ -14,6 +21,17 @@ class StorageService:
         )
         self.container_name = settings.AZURE_STORAGE_CONTAINER_NAME
         self.export_container_name = settings.AZURE_STORAGE_EXPORT_CONTAINER_NAME
+
+        # Parse the connection string once, not per presigned URL
+        conn_parts = dict(
+            part.split("=", 1) for part in settings.AZURE_STORAGE_CONNECTION_STRING.split(";") if "=" in part
+        )
+        self._account_name = conn_parts.get("AccountName") or self.client.account_name
+        self._account_key = conn_parts.get("AccountKey")
+
+        # Per-instance cache of SAS tokens keyed by (blob_path, expiry_bucket)
+        self._sas_token = functools.lru_cache(maxsize=4096)(self._generate_sas_token)
+
         self._ensure_containers()
 
     def _ensure_containers(self) -> None:
@@ -51,14 +69,16 @@ class StorageService:
             blob=blob_name,
         )
 
-        # Check if already exists (idempotent)
-        if not blob_client.exists():
-            content_settings = ContentSettings(content_type=mime_type)
+        # Conditional create in one round trip; an existing blob has the same
+        # content (hash-addressed), so a conflict means already uploaded
+        try:
             blob_client.upload_blob(
                 file_content,
                 overwrite=False,
-                content_settings=content_settings,
+                content_settings=ContentSettings(content_type=mime_type),
             )
+        except ResourceExistsError:
+            pass
 
         return blob_name
 
@@ -74,8 +94,16 @@ class StorageService:
             pass  # Best effort
 
     def compute_hash_streaming(self, file_bytes: bytes) -> str:
-        """Compute SHA-256 hash"""
-        return hashlib.sha256(file_bytes).hexdigest()
+        """Compute SHA-256 hash in chunks (zero-copy slices, GIL released per update)"""
+        hasher = hashlib.sha256()
+        view = memoryview(file_bytes)
+        for offset in range(0, len(view), HASH_CHUNK_SIZE):
+            hasher.update(view[offset:offset + HASH_CHUNK_SIZE])
+        return hasher.hexdigest()
+
+    def compute_hash_stream(self, fp: BinaryIO) -> str:
+        """Compute SHA-256 hash of a binary file object (e.g. SpooledTemporaryFile)"""
+        return hashlib.file_digest(fp, "sha256").hexdigest()
 
     def generate_presigned_url(self, blob_path: str, expires_in_seconds: int = 3600) -> str:
         """
@@ -94,25 +122,14 @@ class StorageService:
                 blob=blob_path,
             )
 
-            # Parse account key from connection string
-            conn_parts = dict(
-                part.split("=", 1) for part in settings.AZURE_STORAGE_CONNECTION_STRING.split(";") if "=" in part
-            )
-            account_key = conn_parts.get("AccountKey")
-
-            if not account_key:
+            if not self._account_key:
                 # Fallback: return blob URL without SAS (works for public containers)
                 return blob_client.url
 
-            # Generate SAS token
-            sas_token = generate_blob_sas(
-                account_name=blob_client.account_name,
-                container_name=self.container_name,
-                blob_name=blob_path,
-                account_key=account_key,
-                permission=BlobSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(seconds=expires_in_seconds),
-            )
+            # Round expiry up to the next bucket: the URL stays valid for at least
+            # expires_in_seconds and repeat requests reuse the cached token
+            expiry_bucket = -(-(int(time.time()) + expires_in_seconds) // SAS_EXPIRY_BUCKET_SECONDS)
+            sas_token = self._sas_token(blob_path, expiry_bucket * SAS_EXPIRY_BUCKET_SECONDS)
 
             # Return full URL with SAS token
             return f"{blob_client.url}?{sas_token}"
@@ -125,6 +142,17 @@ class StorageService:
             )
             return blob_client.url
 
+    def _generate_sas_token(self, blob_path: str, expiry_epoch: int) -> str:
+        """Sign a read-only SAS token for a blob (cached via self._sas_token)"""
+        return generate_blob_sas(
+            account_name=self._account_name,
+            container_name=self.container_name,
+            blob_name=blob_path,
+            account_key=self._account_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.fromtimestamp(expiry_epoch, tz=timezone.utc),
+        )
+
     def check_health(self) -> bool:
         """Check if storage is accessible"""
         try:
@@ -1,24 +1,44 @@
 """Cleanup tasks for cache and old records"""
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
 from datetime import datetime, timedelta, timezone
 from ..db.models import IdempotencyCache
 from ..core.database import SessionLocal
 
+# Rows removed per DELETE statement; keeps each transaction and its locks short
+CLEANUP_BATCH_SIZE = 10000
 
-def cleanup_idempotency_cache(days: int = 31) -> int:
+
+def cleanup_idempotency_cache(days: int = 31, batch_size: int = CLEANUP_BATCH_SIZE) -> int:
     """
     Delete idempotency cache entries older than N days
 
+    Deletes in batches of `batch_size`, committing after each, so concurrent
+    uploads are never blocked behind one long-running DELETE.
+
     Returns number of deleted entries
     """
     db = SessionLocal()
     try:
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        deleted = db.query(IdempotencyCache).filter(
-            IdempotencyCache.created_at < cutoff
-        ).delete()
-        db.commit()
-        return deleted
+        expired_keys = (
+            select(IdempotencyCache.idempotency_key)
+            .where(IdempotencyCache.created_at < cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        stmt = (
+            delete(IdempotencyCache)
+            .where(IdempotencyCache.idempotency_key.in_(expired_keys))
+            .execution_options(synchronize_session=False)
+        )
+
+        deleted = 0
+        while True:
+            count = db.execute(stmt).rowcount
+            db.commit()
+            deleted += count
+            if count < batch_size:
+                return deleted
     finally:
         db.close()
 
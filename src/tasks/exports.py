@@ -0,0 +1,71 @@
+"""Export package build task"""
+import logging
+from datetime import datetime, timezone
+
+from ..db.models import Export
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..services.exports import export_service
+from ..services.storage import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+def build_export(export_id: str) -> None:
+    """
+    Build, sign and upload the ZIP package for a pending export
+
+    Runs after the POST response has been sent, with its own database
+    session. The export row ends up "completed" or "failed"; clients poll
+    GET /exports/{export_id} for the outcome.
+    """
+    db = SessionLocal()
+    try:
+        db_export = db.query(Export).filter(Export.export_id == export_id).first()
+        if db_export is None:
+            logger.error(f"Export {export_id} not found")
+            return
+
+        try:
+            db_export.status = "processing"
+            db.commit()
+
+            zip_file, zip_size, file_count, signature = export_service.create_export_package(
+                db=db,
+                export_id=db_export.export_id,
+                application_id=db_export.application_id,
+                tenant_id=db_export.tenant_id,
+                include_metadata=db_export.include_metadata,
+                sign_package=db_export.sign_package,
+            )
+
+            # Upload to storage
+            storage_path = f"{settings.EXPORT_STORAGE_PREFIX}{db_export.export_id}.zip"
+            blob_client = storage_service.client.get_blob_client(
+                container=storage_service.container_name,
+                blob=storage_path,
+            )
+            with zip_file:
+                blob_client.upload_blob(
+                    zip_file,
+                    length=zip_size,
+                    overwrite=True,
+                    content_settings={"content_type": "application/zip"},
+                )
+
+            db_export.status = "completed"
+            db_export.storage_path = storage_path
+            db_export.file_count = file_count
+            db_export.total_size_bytes = zip_size
+            db_export.signature = signature
+            db_export.completed_at = datetime.now(timezone.utc)
+            db.commit()
+
+        except Exception as e:
+            logger.error(f"Failed to process export {export_id}: {e}")
+            db.rollback()
+            db_export.status = "failed"
+            db_export.error_message = str(e)
+            db.commit()
+    finally:
+        db.close()
@@ -1,5 +1,5 @@
 """Development JWT token generator"""
-from jose import jwt
+import jwt
 from datetime import datetime, timedelta, timezone
 from ..core.config import settings
 
@@ -1,96 +1,248 @@
 """
 Pytest configuration and fixtures for comprehensive test suite
 """
+import functools
 import io
+import itertools
 import os
+import sqlite3
+import time
 import pytest
 import hashlib
+import httpx
 from datetime import datetime, timedelta
-from typing import Generator, Any
+from types import MappingProxyType
+from typing import AsyncGenerator, Generator, Any, Mapping
 from unittest.mock import Mock, MagicMock, patch
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 from PIL import Image
 
-from src.db.models import Base, Evidence, Export
-from src.core.database import get_db
-from src.core.rate_limit import rate_limiter
-from src.main import app
+# Test environment must be in place before src.core.config builds settings;
+# values already set in the real environment win
+_TEST_ENV = {
+    "ENVIRONMENT": "test",
+    "DATABASE_URL": "sqlite:///:memory:",
+    "JWT_SECRET": "test-secret-key-for-testing-only",
+    "AZURE_STORAGE_CONNECTION_STRING": (
+        "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA=="
+    ),
+    "AZURE_STORAGE_CONTAINER_NAME": "test-evidence",
+    "AZURE_STORAGE_EXPORT_CONTAINER_NAME": "test-exports",
+    "AUTH_REQUIRED": "false",
+    "RATE_LIMIT_ENABLED": "true",
+    "RATE_LIMIT_PER_MINUTE": "60",
+}
+os.environ.update({k: v for k, v in _TEST_ENV.items() if k not in os.environ})
+
+# StorageService creates containers on import; keep the suite offline
+with patch("azure.storage.blob.BlobServiceClient.from_connection_string"):
+    from src.db.models import Base, Evidence, Export
+    from src.core.database import get_db
+    from src.core.rate_limit import rate_limiter
+    from src.main import app
+
+
+def _encode_jpeg_1x1() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (1, 1), color="red").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+# Encoded once per session; the bytes never change
+_JPEG_1x1 = _encode_jpeg_1x1()
+_JPEG_1x1_SHA256 = hashlib.sha256(_JPEG_1x1).hexdigest()
+
+
+@functools.lru_cache(maxsize=128)
+def _sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _mock_hash_streaming(file_bytes: bytes) -> str:
+    return _sha256_hex(bytes(file_bytes))
+
+
+# Fixed timestamps and ID sequence for factory-created rows
+_NOW = datetime(2025, 1, 1, 0, 0, 0)
+_EXPIRES = _NOW + timedelta(days=7)
+_export_seq = itertools.count()
 
 
 # ============================================================================
 # DATABASE FIXTURES
 # ============================================================================
 
-@pytest.fixture(scope="function")
-def test_db() -> Generator[Session, None, None]:
+def _connect_sqlite() -> sqlite3.Connection:
     """
-    Create an in-memory SQLite database for testing
+    Open the in-memory test database with foreign keys enforced
 
-    Each test gets a fresh database with all tables created.
-    Automatically cleans up after the test.
+    isolation_level=None lets SQLAlchemy emit BEGIN itself: pysqlite's
+    implicit transactions would otherwise commit around SAVEPOINTs.
+    Durability pragmas are off; the database never outlives the session.
     """
-    # Create in-memory SQLite database
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    connection = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+    for pragma in (
+        "journal_mode=MEMORY",
+        "synchronous=OFF",
+        "temp_store=MEMORY",
+        "locking_mode=EXCLUSIVE",
+        "foreign_keys=ON",
+    ):
+        connection.execute(f"PRAGMA {pragma}")
+    return connection
+
+
+@pytest.fixture(scope="session")
+def _engine():
+    """
+    In-memory SQLite engine shared by the whole session
+
+    Tables are created once; test_db isolates tests with a rolled-back
+    outer transaction instead of recreating the schema. Under pytest-xdist
+    each worker process gets its own in-memory database.
+    """
+    engine = create_engine("sqlite://", creator=_connect_sqlite, poolclass=StaticPool)
 
-    # Enable foreign key support for SQLite
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    @event.listens_for(engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
 
-    # Create all tables
     Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
 
-    # Create session
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = TestingSessionLocal()
+@pytest.fixture(scope="function")
+def test_db(_engine) -> Generator[Session, None, None]:
+    """
+    Database session for one test
+
+    Runs inside an outer transaction that is rolled back afterwards.
+    Code under test may commit freely: each commit only releases a
+    SAVEPOINT, so nothing outlives the test.
+    """
+    connection = _engine.connect()
+    trans = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
 
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
+        trans.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def query_counter(_engine) -> Generator[list[str], None, None]:
+    """
+    SQL statements executed on the test engine while the test runs
+
+    For N+1 guards: issue one request, then assert on len() of the list.
+    Includes the SAVEPOINT test_db opens when the request's session begins.
+    """
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(_engine, "before_cursor_execute", _record)
+
+
+@pytest.fixture(scope="session")
+def _client() -> Generator[TestClient, None, None]:
+    """
+    FastAPI test client shared by the whole session
+
+    The app lifespan (startup/shutdown) runs once, not per test.
+    """
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture(scope="function")
-def client(test_db: Session) -> Generator[TestClient, None, None]:
+def client(_client: TestClient, test_db: Session) -> Generator[TestClient, None, None]:
     """
-    Create FastAPI test client with dependency overrides
+    FastAPI test client with dependency overrides
 
     Overrides:
     - Database session (uses test_db)
-    - Storage service (uses mock)
-    - EXIF extractor (uses mock)
     """
     def override_get_db():
-        try:
-            yield test_db
-        finally:
-            pass
+        yield test_db
 
     app.dependency_overrides[get_db] = override_get_db
+    yield _client
+    app.dependency_overrides.pop(get_db, None)
 
-    with TestClient(app) as test_client:
-        yield test_client
 
-    app.dependency_overrides.clear()
+@pytest.fixture(scope="function")
+async def async_client(test_db: Session) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """
+    Async HTTP client driving the app in-process over ASGI
+
+    Requests run on the test's own event loop, so several can be awaited
+    concurrently (asyncio.gather). Same database override as `client`.
+    """
+    def override_get_db():
+        yield test_db
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+        yield test_client
+    app.dependency_overrides.pop(get_db, None)
 
 
 # ============================================================================
 # STORAGE SERVICE MOCKS
 # ============================================================================
 
+def _configure_storage_mock(mock: MagicMock) -> None:
+    mock.upload_file = Mock(return_value="evidence/ab/abc123...")
+    mock.delete_file = Mock()
+    # Plain function: no test inspects its calls, so skip the Mock call machinery
+    mock.compute_hash_streaming = _mock_hash_streaming
+    mock.generate_presigned_url = Mock(
+        return_value="https://storage.example.com/evidence/abc123?sas=token"
+    )
+    mock.check_health = Mock(return_value=True)
+
+
+def _configure_exif_mock(instance: MagicMock) -> None:
+    instance.extract_metadata.return_value = {
+        "gps": {
+            "latitude": 64.1466,
+            "longitude": -21.9426,
+            "accuracy": 10.0,
+        },
+        "timestamp": time.time(),  # epoch seconds
+    }
+
+
+@pytest.fixture(scope="session")
+def _storage_patch() -> Generator[MagicMock, None, None]:
+    """Patch the storage service once for the rest of the session"""
+    patcher = patch("src.services.storage.storage_service")
+    yield patcher.start()
+    patcher.stop()
+
+
+@pytest.fixture(scope="session")
+def _exif_patch() -> Generator[MagicMock, None, None]:
+    """Patch the EXIF extractor class once for the rest of the session"""
+    patcher = patch("src.services.exif_extractor.ExifExtractor")
+    yield patcher.start().return_value
+    patcher.stop()
+
+
 @pytest.fixture(scope="function")
-def mock_storage():
+def mock_storage(_storage_patch: MagicMock) -> MagicMock:
     """
     Mock Azure Blob Storage service
 
@@ -99,72 +251,77 @@ def mock_storage():
     - Presigned URL generation
     - File deletion
     - Health checks
+
+    The patch is installed once per session; each test gets the mock
+    with call history cleared and default return values restored.
+    """
+    _storage_patch.reset_mock()
+    _configure_storage_mock(_storage_patch)
+    return _storage_patch
+
+
+@pytest.fixture(scope="function")
+def presigned_url_stub(mock_storage: MagicMock):
+    """
+    Default presigned URLs for the storage mock: https://cdn.test/<path>?sig=stub
+
+    Installed as a side_effect memoized per (path, expiry), like the SAS
+    token cache in StorageService; `.cache_info()` on the returned function
+    reports hits. Tests needing another URL set return_value/side_effect.
     """
-    with patch("src.services.storage.storage_service") as mock:
-        # Configure mock methods
-        mock.upload_file = Mock(return_value="evidence/ab/abc123...")
-        mock.delete_file = Mock()
-        mock.compute_hash_streaming = Mock(side_effect=lambda b: hashlib.sha256(b).hexdigest())
-        mock.generate_presigned_url = Mock(
-            return_value="https://storage.example.com/evidence/abc123?sas=token"
-        )
-        mock.check_health = Mock(return_value=True)
+    @functools.lru_cache(maxsize=1024)
+    def _presign(blob_path: str, expires_in_seconds: int = 3600) -> str:
+        return f"https://cdn.test/{blob_path}?sig=stub"
 
-        yield mock
+    mock_storage.generate_presigned_url.side_effect = _presign
+    return _presign
 
 
 @pytest.fixture(scope="function")
-def mock_exif():
+def mock_exif(_exif_patch: MagicMock) -> MagicMock:
     """
     Mock EXIF metadata extractor
 
     Returns realistic GPS and timestamp data for test images
     """
-    with patch("src.services.exif_extractor.ExifExtractor") as MockExtractor:
-        instance = MockExtractor.return_value
-        instance.extract_metadata.return_value = {
-            "gps": {
-                "latitude": 64.1466,
-                "longitude": -21.9426,
-                "accuracy": 10.0,
-            },
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-        yield instance
+    _exif_patch.reset_mock()
+    _configure_exif_mock(_exif_patch)
+    return _exif_patch
 
 
 # ============================================================================
 # TEST DATA GENERATORS
 # ============================================================================
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_image() -> bytes:
     """
-    Generate a valid JPEG image for testing
+    Valid JPEG image for testing
 
     Returns 1x1 pixel RGB JPEG (minimal valid image)
     """
-    img = Image.new("RGB", (1, 1), color="red")
-    buf = io.BytesIO()
-    img.save(buf, format="JPEG")
-    return buf.getvalue()
+    return _JPEG_1x1
+
+
+@pytest.fixture(scope="session")
+def sample_image_sha256() -> str:
+    """SHA-256 hex digest of sample_image, computed once at import"""
+    return _JPEG_1x1_SHA256
 
 
 @pytest.fixture
-def sample_evidence_data(sample_image: bytes) -> dict[str, Any]:
+def sample_evidence_data(sample_image: bytes, sample_image_sha256: str) -> dict[str, Any]:
     """
     Create valid evidence upload request data
 
     Includes all required fields with realistic values
     """
-    file_hash = hashlib.sha256(sample_image).hexdigest()
-
     return {
         "evidence_id": "test-evidence-001",
         "application_id": "app-test-001",
         "tenant_id": "tenant-test-001",
         "timestamp": datetime.utcnow().isoformat(),
-        "file_hash": file_hash,
+        "file_hash": sample_image_sha256,
         "file_size": len(sample_image),
         "mime_type": "image/jpeg",
         "metadata": {
@@ -179,79 +336,169 @@ def sample_evidence_data(sample_image: bytes) -> dict[str, Any]:
     }
 
 
+_SAMPLE_EXPORT_DATA: Mapping[str, Any] = MappingProxyType({
+    "application_id": "app-test-001",
+    "tenant_id": "tenant-test-001",
+    "options": MappingProxyType({
+        "include_metadata": True,
+        "include_signatures": True,
+        "format": "zip",
+    }),
+})
+
+
 @pytest.fixture
-def sample_export_data() -> dict[str, Any]:
+def sample_export_data() -> Mapping[str, Any]:
     """
-    Create valid export request data
+    Valid export request data (read-only, shared by every test)
+
+    Layer per-test changes with ChainMap({...}, sample_export_data) and
+    convert to plain dicts at the request boundary.
     """
+    return _SAMPLE_EXPORT_DATA
+
+
+# ============================================================================
+# DATABASE FACTORY FIXTURES
+# ============================================================================
+
+def _evidence_defaults() -> dict[str, Any]:
+    """Default Evidence column values for the factory fixtures"""
     return {
+        "evidence_id": "test-evidence-001",
         "application_id": "app-test-001",
         "tenant_id": "tenant-test-001",
-        "options": {
-            "include_metadata": True,
-            "include_signatures": True,
-            "format": "zip",
-        },
+        "evidence_type": "photo",
+        "mime_type": "image/jpeg",
+        "mime_type_detected": "image/jpeg",
+        "file_size_bytes": 1024,
+        "sha256_hash_device": "abc123" * 10 + "abcd",  # 64 char hex
+        "sha256_hash_server": "abc123" * 10 + "abcd",
+        "captured_at_device": _NOW,
+        "captured_at_server": _NOW,
+        "time_drift_seconds": 0.0,
+        "gps_latitude": 64.1466,
+        "gps_longitude": -21.9426,
+        "gps_accuracy_meters": 10.0,
+        "exif_present": False,
+        "uploader_role": "applicant_owner",
+        "uploader_id": "user-test-001",
+        "storage_path": "evidence/ab/abc123",
+        "integrity_passed": True,
+        "correlation_id": "corr-test-001",
     }
 
 
-# ============================================================================
-# DATABASE FACTORY FIXTURES
-# ============================================================================
+def _export_defaults() -> dict[str, Any]:
+    """Default Export column values for the bulk factory"""
+    return {
+        "export_id": "exp-bulk",
+        "application_id": "app-test-001",
+        "tenant_id": "tenant-test-001",
+        "format": "zip",
+        "include_metadata": True,
+        "sign_package": True,
+        "status": "pending",
+        "created_by": "user-test-001",
+        "created_at": _NOW,
+        "expires_at": _EXPIRES,
+        "correlation_id": "corr-test-001",
+    }
+
+
+def _bulk_insert_exports(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Insert Export rows with one executemany INSERT and commit"""
+    db.execute(insert(Export), rows)
+    db.commit()
+
 
 @pytest.fixture
 def create_evidence(test_db: Session):
     """
     Factory fixture for creating Evidence records
 
+    Pass refresh=True to reload server-populated columns right away.
+
     Usage:
         evidence = create_evidence(evidence_id="test-001", ...)
     """
-    def _create_evidence(**kwargs) -> Evidence:
-        defaults = {
-            "evidence_id": "test-evidence-001",
-            "application_id": "app-test-001",
-            "tenant_id": "tenant-test-001",
-            "storage_path": "evidence/ab/abc123",
-            "file_hash": "abc123" * 10 + "abcd",  # 64 char hex
-            "file_size": 1024,
-            "mime_type": "image/jpeg",
-            "timestamp": datetime.utcnow(),
-            "metadata": {
-                "gps": {"latitude": 64.1466, "longitude": -21.9426, "accuracy": 10.0},
-                "device_id": "device-001",
-            },
-            "idempotency_key": None,
-        }
-        defaults.update(kwargs)
-
-        evidence = Evidence(**defaults)
+    def _create_evidence(refresh: bool = False, **kwargs) -> Evidence:
+        evidence = Evidence(**{**_evidence_defaults(), **kwargs})
         test_db.add(evidence)
         test_db.commit()
-        test_db.refresh(evidence)
+        if refresh:
+            test_db.refresh(evidence)
         return evidence
 
     return _create_evidence
 
 
+@pytest.fixture
+def create_evidence_bulk(test_db: Session):
+    """
+    Factory fixture for inserting many Evidence rows in one statement
+
+    Uses a Core-style INSERT (no ORM objects, identity map or events) and a
+    single commit. Records without an evidence_id are numbered
+    test-evidence-001, -002, ... Returns the inserted evidence IDs.
+
+    Usage:
+        ids = create_evidence_bulk([{"application_id": "app-1"}] * 50)
+    """
+    def _create_evidence_bulk(records: list[dict[str, Any]]) -> list[str]:
+        rows = [
+            {**_evidence_defaults(), "evidence_id": f"test-evidence-{i:03d}", **record}
+            for i, record in enumerate(records, 1)
+        ]
+        test_db.execute(insert(Evidence), rows)
+        test_db.commit()
+        return [row["evidence_id"] for row in rows]
+
+    return _create_evidence_bulk
+
+
+@pytest.fixture
+def create_export_bulk(test_db: Session):
+    """
+    Factory fixture for inserting many Export rows in one statement
+
+    Same approach as create_evidence_bulk. Records without an export_id
+    get a fresh exp-N id. Returns the inserted export IDs.
+
+    Usage:
+        ids = create_export_bulk([{"application_id": "app-1", "status": "completed"}] * 3)
+    """
+    def _create_export_bulk(records: list[dict[str, Any]]) -> list[str]:
+        rows = [
+            {**_export_defaults(), "export_id": f"exp-{next(_export_seq)}", **record}
+            for record in records
+        ]
+        _bulk_insert_exports(test_db, rows)
+        return [row["export_id"] for row in rows]
+
+    return _create_export_bulk
+
+
 @pytest.fixture
 def create_export(test_db: Session):
     """
     Factory fixture for creating Export records
 
+    Pass refresh=True to reload server-populated columns right away.
+
     Usage:
         export = create_export(export_id="exp-001", status="pending", ...)
     """
-    def _create_export(**kwargs) -> Export:
+    def _create_export(refresh: bool = False, **kwargs) -> Export:
         defaults = {
-            "export_id": f"exp-{datetime.utcnow().timestamp()}",
+            "export_id": f"exp-{next(_export_seq)}",
             "application_id": "app-test-001",
             "tenant_id": "tenant-test-001",
             "status": "pending",
             "storage_path": None,
             "file_size": None,
-            "created_at": datetime.utcnow(),
-            "expires_at": datetime.utcnow() + timedelta(days=7),
+            "created_at": _NOW,
+            "expires_at": _EXPIRES,
             "options": {"include_metadata": True},
             "error_message": None,
         }
@@ -260,7 +507,8 @@ def create_export(test_db: Session):
         export = Export(**defaults)
         test_db.add(export)
         test_db.commit()
-        test_db.refresh(export)
+        if refresh:
+            test_db.refresh(export)
         return export
 
     return _create_export
@@ -270,16 +518,16 @@ def create_export(test_db: Session):
 # RATE LIMITER FIXTURES
 # ============================================================================
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
 def reset_rate_limiter():
     """
-    Automatically reset rate limiter before each test
+    Reset rate limiter before the test
 
-    Ensures tests don't interfere with each other
+    Opt in from modules that send requests through the app:
+        pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
     """
     rate_limiter.reset_all()
     yield
-    rate_limiter.reset_all()
 
 
 # ============================================================================
@@ -321,12 +569,12 @@ def freeze_time():
         with freeze_time("2025-01-01T00:00:00Z"):
             # Your test code
     """
-    from unittest.mock import patch
-    from datetime import datetime
+    from contextlib import contextmanager
 
+    @contextmanager
     def _freeze(frozen_time: str):
         frozen_dt = datetime.fromisoformat(frozen_time.replace("Z", "+00:00"))
-        return patch("datetime.datetime") as mock_datetime:
+        with patch("datetime.datetime") as mock_datetime:
             mock_datetime.utcnow.return_value = frozen_dt
             mock_datetime.side_effect = lambda *args, **kwargs: datetime(*args, **kwargs)
             yield mock_datetime
@@ -342,8 +590,9 @@ def clean_db(test_db: Session):
     Useful for tests that need a completely fresh state
     """
     def _clean():
-        test_db.query(Export).delete()
-        test_db.query(Evidence).delete()
+        connection = test_db.connection()
+        connection.exec_driver_sql("DELETE FROM exports")
+        connection.exec_driver_sql("DELETE FROM evidence")
         test_db.commit()
 
     return _clean
@@ -357,19 +606,8 @@ def pytest_configure(config):
     """
     Pytest configuration hook
 
-    Sets environment variables and test markers
+    Registers test markers (environment is set at module import above)
     """
-    # Set test environment
-    os.environ["ENVIRONMENT"] = "test"
-    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
-    os.environ["JWT_SECRET"] = "test-secret-key-for-testing-only"
-    os.environ["AZURE_STORAGE_CONNECTION_STRING"] = "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA=="
-    os.environ["AZURE_STORAGE_CONTAINER_NAME"] = "test-evidence"
-    os.environ["AZURE_STORAGE_EXPORT_CONTAINER_NAME"] = "test-exports"
-    os.environ["AUTH_REQUIRED"] = "false"
-    os.environ["RATE_LIMIT_ENABLED"] = "true"
-    os.environ["RATE_LIMIT_PER_MINUTE"] = "60"
-
     # Register custom markers
     config.addinivalue_line("markers", "slow: marks tests as slow (deselect with '-m \"not slow\"')")
     config.addinivalue_line("markers", "integration: marks tests as integration tests")
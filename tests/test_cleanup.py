@@ -0,0 +1,31 @@
+"""
+Tests for scheduled cleanup tasks
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy.orm import Session
+
+from src.db.models import IdempotencyCache
+from src.tasks.cleanup import cleanup_idempotency_cache
+
+
+def test_idempotency_cleanup_deletes_in_batches(test_db: Session):
+    old = datetime.now(timezone.utc) - timedelta(days=40)
+    test_db.add_all(
+        IdempotencyCache(
+            idempotency_key=f"old_{i}",
+            tenant_id="tenant_001",
+            response_json="{}",
+            created_at=old,
+        )
+        for i in range(7)
+    )
+    test_db.add(IdempotencyCache(idempotency_key="fresh", tenant_id="tenant_001", response_json="{}"))
+    test_db.commit()
+
+    with patch("src.tasks.cleanup.SessionLocal", return_value=test_db):
+        deleted = cleanup_idempotency_cache(days=31, batch_size=3)
+
+    assert deleted == 7
+    assert [row.idempotency_key for row in test_db.query(IdempotencyCache)] == ["fresh"]
@@ -0,0 +1,102 @@
+"""
+Evidence GET endpoints must return the same JSON as EvidenceDetailResponse
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.db.models import Evidence
+from src.schemas.evidence import EvidenceDetailResponse
+
+pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
+
+PRESIGNED_URL = "https://storage.example.com/evidence/ab/abc?sas=token"
+
+
+def _evidence(evidence_id: str, created_at: datetime) -> Evidence:
+    return Evidence(
+        evidence_id=evidence_id,
+        application_id="app_test_001",
+        tenant_id="dev_tenant",
+        evidence_type="photo",
+        mime_type="image/jpeg",
+        mime_type_detected="image/jpeg",
+        file_size_bytes=2048,
+        sha256_hash_device="a" * 64,
+        sha256_hash_server="a" * 64,
+        captured_at_device=datetime(2025, 1, 1, 12, 0, 0, 123456),
+        captured_at_server=datetime(2025, 1, 1, 12, 0, 5),
+        time_drift_seconds=4.876544,
+        gps_latitude=64.1466,
+        gps_longitude=-21.9426,
+        gps_accuracy_meters=10.0,
+        exif_present=True,
+        exif_data={"Make": "Canon", "GPS": {"lat": 64.1466}},
+        uploader_role="applicant_owner",
+        uploader_id="user_test_001",
+        storage_path=f"evidence/aa/{evidence_id}",
+        integrity_passed=False,
+        integrity_issues=["GPS mismatch"],
+        correlation_id="corr-test",
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def _expected(evidence: Evidence) -> dict:
+    """JSON produced by the previous response_model serialization path"""
+    return EvidenceDetailResponse(
+        **{c: getattr(evidence, c) for c in EvidenceDetailResponse.model_fields if c != "storage_uri"},
+        storage_uri=PRESIGNED_URL,
+    ).model_dump(mode="json")
+
+
+@pytest.fixture
+def seeded(test_db: Session) -> list[Evidence]:
+    rows = [
+        _evidence("ev_test_001", datetime(2025, 1, 2, 8, 30, 0, 500)),
+        _evidence("ev_test_002", datetime(2025, 1, 3, 9, 0, 0)),
+    ]
+    test_db.add_all(rows)
+    test_db.commit()
+    return rows
+
+
+@pytest.fixture(autouse=True)
+def presign():
+    with patch(
+        "src.api.evidence.storage_service.generate_presigned_url",
+        return_value=PRESIGNED_URL,
+    ) as mock:
+        yield mock
+
+
+def test_get_evidence_json_unchanged(client: TestClient, seeded: list[Evidence]):
+    response = client.get("/api/v1/evidence/ev_test_001")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body == _expected(seeded[0])
+    assert body["captured_at_device"] == "2025-01-01T12:00:00.123456"
+    assert body["storage_uri"] == PRESIGNED_URL
+
+
+def test_list_evidence_json_unchanged(client: TestClient, seeded: list[Evidence]):
+    response = client.get("/api/v1/evidence/application/app_test_001")
+
+    assert response.status_code == 200
+    assert response.json() == [_expected(seeded[1]), _expected(seeded[0])]
+
+
+def test_list_evidence_many_rows(client: TestClient, create_evidence_bulk):
+    ids = create_evidence_bulk(
+        [{"application_id": "app_bulk", "tenant_id": "dev_tenant"} for _ in range(40)]
+    )
+
+    response = client.get("/api/v1/evidence/application/app_bulk")
+
+    assert response.status_code == 200
+    assert sorted(item["evidence_id"] for item in response.json()) == ids
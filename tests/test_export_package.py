@@ -0,0 +1,363 @@
+"""
+Tests for export package building (blob storage mocked)
+"""
+import asyncio
+import hashlib
+import io
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db.models import Evidence, Export
+from src.services.exports import ExportService, export_service
+from src.services.storage import storage_service
+from src.tasks.exports import build_export
+
+APPLICATION_ID = "app_export_001"
+TENANT_ID = "tenant_export_001"
+
+
+def _add_evidence(db: Session, count: int, sha256: str = "a" * 64) -> list[Evidence]:
+    rows = [
+        Evidence(
+            evidence_id=f"ev_{i:03d}",
+            application_id=APPLICATION_ID,
+            tenant_id=TENANT_ID,
+            evidence_type="photo",
+            mime_type="image/jpeg",
+            mime_type_detected="image/jpeg",
+            file_size_bytes=16,
+            sha256_hash_device="a" * 64,
+            sha256_hash_server=sha256,
+            captured_at_device=datetime(2025, 1, 1, 12, 0, i),
+            captured_at_server=datetime(2025, 1, 1, 12, 0, i),
+            time_drift_seconds=0.0,
+            gps_latitude=64.1466,
+            gps_longitude=-21.9426,
+            gps_accuracy_meters=10.0,
+            exif_present=False,
+            uploader_role="applicant_owner",
+            uploader_id="user_001",
+            storage_path=f"evidence/aa/blob_{i:03d}",
+            integrity_passed=True,
+            correlation_id="corr-export",
+            created_at=datetime(2025, 1, 2, 0, 0, i),
+        )
+        for i in range(count)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+@pytest.fixture
+def blob_store():
+    """Map of blob path -> bytes served by a mocked storage client"""
+    blobs: dict[str, bytes] = {}
+
+    def get_blob_client(container, blob):
+        client = MagicMock()
+        if blob not in blobs:
+            client.download_blob.side_effect = RuntimeError(f"missing blob {blob}")
+        else:
+            data = blobs[blob]
+            client.download_blob.return_value.chunks.return_value = [data[:5], data[5:]]
+        return client
+
+    with patch("src.services.exports.storage_service.client") as client:
+        client.get_blob_client.side_effect = get_blob_client
+        yield blobs
+
+
+def _build(db: Session) -> tuple[zipfile.ZipFile, int, dict]:
+    zip_file, zip_size, count, _ = export_service.create_export_package(
+        db=db,
+        export_id="export_test",
+        application_id=APPLICATION_ID,
+        tenant_id=TENANT_ID,
+        sign_package=False,
+    )
+    zip_bytes = zip_file.read()
+    zip_file.close()
+    assert len(zip_bytes) == zip_size
+    archive = zipfile.ZipFile(io.BytesIO(zip_bytes))
+    return archive, count, json.loads(archive.read("manifest.json"))
+
+
+def test_files_in_upload_order(test_db: Session, blob_store: dict):
+    rows = _add_evidence(test_db, 50)
+    for row in rows:
+        blob_store[row.storage_path] = row.evidence_id.encode() * 4
+
+    archive, count, manifest = _build(test_db)
+
+    assert count == 50
+    assert manifest["evidence"][1]["captured_at"] == "2025-01-01T12:00:01"
+    names = [e["filename"] for e in manifest["evidence"]]
+    assert names == [f"evidence/{i + 1:03d}_ev_{i:03d}.jpg" for i in range(50)]
+    for row, name in zip(rows, names):
+        assert archive.read(name) == row.evidence_id.encode() * 4
+
+
+def test_failed_download_skipped(test_db: Session, blob_store: dict):
+    rows = _add_evidence(test_db, 3)
+    blob_store[rows[0].storage_path] = b"first"
+    blob_store[rows[2].storage_path] = b"third"
+
+    archive, _, manifest = _build(test_db)
+
+    assert [e["evidence_id"] for e in manifest["evidence"]] == ["ev_000", "ev_002"]
+    assert archive.read("evidence/003_ev_002.jpg") == b"third"
+
+
+def test_compressed_media_stored(test_db: Session, blob_store: dict):
+    rows = _add_evidence(test_db, 2)
+    rows[1].mime_type = "application/pdf"
+    test_db.commit()
+    for row in rows:
+        blob_store[row.storage_path] = b"payload " * 64
+
+    archive, _, _ = _build(test_db)
+
+    assert archive.getinfo("evidence/001_ev_000.jpg").compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo("evidence/002_ev_001.pdf").compress_type == zipfile.ZIP_DEFLATED
+    assert archive.getinfo("manifest.json").compress_type == zipfile.ZIP_DEFLATED
+
+
+@pytest.mark.parametrize(
+    "make_key, algorithm",
+    [
+        (lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048), "RS256"),
+        (ed25519.Ed25519PrivateKey.generate, "EdDSA"),
+    ],
+)
+def test_manifest_signature_verifies(tmp_path, monkeypatch, make_key, algorithm):
+    key = make_key()
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    (tmp_path / "private.pem").write_bytes(private_pem)
+    (tmp_path / "public.pem").write_bytes(public_pem)
+    monkeypatch.setattr(settings, "EXPORT_PRIVATE_KEY_PATH", str(tmp_path / "private.pem"))
+    monkeypatch.setattr(settings, "EXPORT_PUBLIC_KEY_PATH", str(tmp_path / "public.pem"))
+
+    signature = ExportService()._sign_manifest({"export_id": "export_test", "evidence": []})
+
+    assert jwt.get_unverified_header(signature)["alg"] == algorithm
+    claims = jwt.decode(signature, public_pem, algorithms=[algorithm])
+    assert claims["export_id"] == "export_test"
+    assert claims["issuer"] == "permia.is"
+
+
+def test_downloaded_hash_verified(test_db: Session, blob_store: dict):
+    rows = _add_evidence(test_db, 2, sha256=hashlib.sha256(b"original").hexdigest())
+    blob_store[rows[0].storage_path] = b"original"
+    blob_store[rows[1].storage_path] = b"tampered"
+
+    _, _, manifest = _build(test_db)
+
+    assert [e["hash_verified"] for e in manifest["evidence"]] == [True, False]
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+def test_create_export_schedules_build(client: TestClient, create_evidence_bulk):
+    create_evidence_bulk([{"application_id": APPLICATION_ID, "tenant_id": "dev_tenant"}])
+
+    with patch("src.api.exports.build_export") as task:
+        response = client.post(
+            f"/api/v1/exports/applications/{APPLICATION_ID}",
+            json={"application_id": APPLICATION_ID},
+        )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "pending"
+    task.assert_called_once_with(body["export_id"])
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+async def test_create_and_poll_export_async(async_client: httpx.AsyncClient, create_evidence_bulk):
+    create_evidence_bulk([{"application_id": APPLICATION_ID, "tenant_id": "dev_tenant"}])
+
+    with patch("src.api.exports.build_export"):
+        created = await async_client.post(
+            f"/api/v1/exports/applications/{APPLICATION_ID}",
+            json={"application_id": APPLICATION_ID},
+        )
+    export_id = created.json()["export_id"]
+
+    statuses = await asyncio.gather(
+        *(async_client.get(f"/api/v1/exports/{export_id}") for _ in range(5))
+    )
+
+    assert created.status_code == 202
+    assert [r.status_code for r in statuses] == [200] * 5
+    assert {r.json()["status"] for r in statuses} == {"pending"}
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+def test_create_export_counts_evidence_once(
+    client: TestClient, create_evidence_bulk, query_counter: list[str]
+):
+    """
+    Creating an export reads evidence with a single COUNT, however many rows exist
+
+    Expected SELECTs: the evidence COUNT and the refresh of the new export row.
+    """
+    create_evidence_bulk([{"application_id": APPLICATION_ID, "tenant_id": "dev_tenant"}] * 25)
+    query_counter.clear()
+
+    with patch("src.api.exports.build_export"):
+        response = client.post(
+            f"/api/v1/exports/applications/{APPLICATION_ID}",
+            json={"application_id": APPLICATION_ID},
+        )
+
+    selects = [sql for sql in query_counter if sql.startswith("SELECT")]
+    assert response.status_code == 202
+    assert len(selects) == 2
+    assert [sql for sql in selects if "FROM evidence" in sql] == [selects[0]]
+    assert "count(*)" in selects[0]
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+def test_create_export_without_evidence(client: TestClient):
+    with patch("src.api.exports.build_export") as task:
+        response = client.post(
+            "/api/v1/exports/applications/app_empty",
+            json={"application_id": "app_empty"},
+        )
+
+    assert response.status_code == 404
+    assert response.json()["code"] == "NO_EVIDENCE"
+    task.assert_not_called()
+
+
+def test_build_export_completes(test_db: Session, blob_store: dict):
+    rows = _add_evidence(test_db, 2)
+    for row in rows:
+        blob_store[row.storage_path] = b"data"
+    test_db.add(Export(
+        export_id="export_task",
+        application_id=APPLICATION_ID,
+        tenant_id=TENANT_ID,
+        sign_package=False,
+        status="pending",
+        created_by="user_001",
+        correlation_id="corr-export",
+    ))
+    test_db.commit()
+
+    with patch("src.tasks.exports.SessionLocal", return_value=test_db):
+        build_export("export_task")
+
+    export = test_db.get(Export, "export_task")
+    assert export.status == "completed"
+    assert export.file_count == 2
+    assert export.storage_path == f"{settings.EXPORT_STORAGE_PREFIX}export_task.zip"
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+def test_presigned_url_cached_across_requests(client: TestClient, test_db: Session):
+    test_db.add(Export(
+        export_id="export_cached",
+        application_id=APPLICATION_ID,
+        tenant_id="dev_tenant",
+        status="completed",
+        storage_path="exports/export_cached.zip",
+        total_size_bytes=1024,
+        created_by="user_001",
+        correlation_id="corr-export",
+        expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+    ))
+    test_db.commit()
+    storage_service._sas_token.cache_clear()
+
+    blob_client = storage_service.client.get_blob_client.return_value
+    with (
+        patch("src.services.storage.generate_blob_sas", return_value="sig=token") as sign,
+        patch.object(blob_client, "url", "https://blob.example/exports/export_cached.zip"),
+        patch.object(blob_client, "download_blob") as download_blob,
+    ):
+        responses = [client.get("/api/v1/exports/export_cached/download") for _ in range(3)]
+
+    urls = [r.json()["download_url"] for r in responses]
+    assert urls == ["https://blob.example/exports/export_cached.zip?sig=token"] * 3
+    sign.assert_called_once()
+    # The ZIP goes from blob storage to the client; the API never reads it
+    download_blob.assert_not_called()
+    assert all(len(r.content) < 1024 for r in responses)
+
+
+def _add_exports(db: Session, statuses: list[str]) -> None:
+    db.add_all(
+        Export(
+            export_id=f"export_list_{i}",
+            application_id=APPLICATION_ID,
+            tenant_id="dev_tenant",
+            status=status,
+            created_by="user_001",
+            correlation_id="corr-export",
+            created_at=datetime(2025, 1, 1) + timedelta(minutes=i),
+        )
+        for i, status in enumerate(statuses)
+    )
+    db.commit()
+
+
+def test_list_exports_uses_index(test_db: Session):
+    plan = test_db.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT * FROM exports "
+            "WHERE tenant_id = :tenant AND application_id = :app AND status = :status "
+            "ORDER BY created_at DESC"
+        ),
+        {"tenant": "dev_tenant", "app": APPLICATION_ID, "status": "completed"},
+    ).all()
+
+    details = " ".join(row[-1] for row in plan)
+    assert "USING INDEX ix_exports_tenant_app_status_created" in details
+    assert "TEMP B-TREE" not in details
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+def test_list_exports_single_query(client: TestClient, test_db: Session, query_counter: list[str]):
+    _add_exports(test_db, ["completed", "failed", "completed", "pending"])
+    query_counter.clear()
+
+    response = client.get(f"/api/v1/exports/applications/{APPLICATION_ID}/list?status=completed")
+
+    assert response.status_code == 200
+    assert [item["export_id"] for item in response.json()] == ["export_list_2", "export_list_0"]
+    # The only other statement is the test session's own SAVEPOINT
+    assert [sql.split()[0] for sql in query_counter] == ["SAVEPOINT", "SELECT"]
+
+
+@pytest.mark.usefixtures("reset_rate_limiter")
+def test_list_exports_no_per_row_queries(client: TestClient, test_db: Session, query_counter: list[str]):
+    _add_exports(test_db, ["completed", "pending", "failed"] * 10)
+    query_counter.clear()
+
+    response = client.get(f"/api/v1/exports/applications/{APPLICATION_ID}/list")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 30
+    # One SELECT for the whole page, not one per export (N+1)
+    assert [sql.split()[0] for sql in query_counter] == ["SAVEPOINT", "SELECT"]
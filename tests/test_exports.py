@@ -11,13 +11,22 @@ Tests cover:
 - Multi-tenant isolation
 - Audit logging
 """
-import json
-from datetime import datetime, timedelta
-from typing import Any
+import pytest
+from collections import ChainMap
+from datetime import datetime, timedelta, timezone
+from typing import Any, Mapping
 from fastapi.testclient import TestClient
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from src.db.models import Export, Evidence, AuditLog
+from src.db.models import Export
+
+pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
+
+
+def _json_body(data: Mapping[str, Any]) -> dict[str, Any]:
+    """Plain dicts for the JSON encoder (one level of nested mappings)"""
+    return {k: dict(v) if isinstance(v, Mapping) else v for k, v in data.items()}
 
 
 class TestExportCreation:
@@ -26,25 +35,23 @@ class TestExportCreation:
     def test_create_export_success(
         self,
         client: TestClient,
-        sample_export_data: dict[str, Any],
-        create_evidence,
+        sample_export_data: Mapping[str, Any],
+        create_evidence_bulk,
         test_db: Session,
     ):
         """Test successful export creation returns 202 Accepted"""
         # Arrange
-        create_evidence(
-            evidence_id="ev-1",
-            application_id=sample_export_data["application_id"],
-            tenant_id=sample_export_data["tenant_id"],
-        )
-        create_evidence(
-            evidence_id="ev-2",
-            application_id=sample_export_data["application_id"],
-            tenant_id=sample_export_data["tenant_id"],
-        )
+        create_evidence_bulk([
+            {
+                "evidence_id": evidence_id,
+                "application_id": sample_export_data["application_id"],
+                "tenant_id": sample_export_data["tenant_id"],
+            }
+            for evidence_id in ("ev-1", "ev-2")
+        ])
 
         # Act
-        response = client.post("/api/v1/exports", json=sample_export_data)
+        response = client.post("/api/v1/exports", json=_json_body(sample_export_data))
 
         # Assert
         assert response.status_code == 202
@@ -54,7 +61,9 @@ class TestExportCreation:
         assert "created_at" in result
 
         # Verify database record
-        db_export = test_db.query(Export).filter_by(export_id=result["export_id"]).first()
+        db_export = test_db.execute(
+            select(Export.status, Export.application_id).where(Export.export_id == result["export_id"])
+        ).one_or_none()
         assert db_export is not None
         assert db_export.status == "pending"
         assert db_export.application_id == sample_export_data["application_id"]
@@ -62,13 +71,13 @@ class TestExportCreation:
     def test_create_export_no_evidence(
         self,
         client: TestClient,
-        sample_export_data: dict[str, Any],
+        sample_export_data: Mapping[str, Any],
     ):
         """Test that creating export with no evidence returns 404"""
         # Arrange - No evidence created
 
         # Act
-        response = client.post("/api/v1/exports", json=sample_export_data)
+        response = client.post("/api/v1/exports", json=_json_body(sample_export_data))
 
         # Assert
         assert response.status_code == 404
@@ -77,7 +86,7 @@ class TestExportCreation:
     def test_create_export_with_custom_options(
         self,
         client: TestClient,
-        sample_export_data: dict[str, Any],
+        sample_export_data: Mapping[str, Any],
         create_evidence,
         test_db: Session,
     ):
@@ -89,27 +98,29 @@ class TestExportCreation:
             tenant_id=sample_export_data["tenant_id"],
         )
 
-        data = sample_export_data.copy()
-        data["options"] = {
-            "include_metadata": False,
-            "include_signatures": True,
-            "format": "tar.gz",
-            "encryption": "aes256",
-        }
+        data = ChainMap({
+            "options": {
+                "include_metadata": False,
+                "include_signatures": True,
+                "format": "tar.gz",
+                "encryption": "aes256",
+            },
+        }, sample_export_data)
 
         # Act
-        response = client.post("/api/v1/exports", json=data)
+        response = client.post("/api/v1/exports", json=_json_body(data))
 
         # Assert
         assert response.status_code == 202
         result = response.json()
 
         # Verify options were stored
-        db_export = test_db.query(Export).filter_by(export_id=result["export_id"]).first()
+        db_export = test_db.get(Export, result["export_id"])
         assert db_export.options["encryption"] == "aes256"
         assert db_export.options["format"] == "tar.gz"
 
 
+@pytest.mark.usefixtures("presigned_url_stub")
 class TestExportRetrieval:
     """Test export status and retrieval endpoints"""
 
@@ -136,7 +147,6 @@ class TestExportRetrieval:
         self,
         client: TestClient,
         create_export,
-        mock_storage,
     ):
         """Test retrieving completed export with download URL"""
         # Arrange
@@ -145,7 +155,6 @@ class TestExportRetrieval:
             storage_path="exports/exp-123.zip",
             file_size=1024000,
         )
-        mock_storage.generate_presigned_url.return_value = "https://storage.example.com/exp-123.zip?sas=token"
 
         # Act
         response = client.get(f"/api/v1/exports/{export.export_id}")
@@ -191,6 +200,7 @@ class TestExportRetrieval:
         assert "not found" in response.json()["detail"].lower()
 
 
+@pytest.mark.usefixtures("presigned_url_stub")
 class TestExportDownload:
     """Test export download endpoint with redirects"""
 
@@ -206,8 +216,6 @@ class TestExportDownload:
             status="completed",
             storage_path="exports/exp-download.zip",
         )
-        presigned_url = "https://storage.example.com/exp-download.zip?sas=token123"
-        mock_storage.generate_presigned_url.return_value = presigned_url
 
         # Act
         response = client.get(
@@ -217,79 +225,70 @@ class TestExportDownload:
 
         # Assert
         assert response.status_code == 307
-        assert response.headers["location"] == presigned_url
-
-    def test_download_export_pending(
+        assert response.headers["location"] == "https://cdn.test/exports/exp-download.zip?sig=stub"
+        # Bytes are served by storage, never proxied through the app
+        assert response.content == b""
+        mock_storage.client.get_blob_client.return_value.download_blob.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "state, extra, expected_code, expected_detail",
+        [
+            ("pending", {}, 409, "not ready"),
+            ("failed", {"error_message": "Generation failed"}, 410, "failed"),
+            (
+                "completed",
+                {"storage_path": "exports/exp-expired.zip", "expires_at": datetime.now(timezone.utc) - timedelta(days=1)},
+                410,
+                "expired",
+            ),
+        ],
+        ids=["pending", "failed", "expired"],
+    )
+    def test_download_export_unavailable(
         self,
         client: TestClient,
         create_export,
+        state: str,
+        extra: dict[str, Any],
+        expected_code: int,
+        expected_detail: str,
     ):
-        """Test that downloading pending export returns 409 Conflict"""
+        """Exports that are not ready (409), failed or expired (410) cannot be downloaded"""
         # Arrange
-        export = create_export(status="pending")
+        export = create_export(status=state, **extra)
 
         # Act
         response = client.get(f"/api/v1/exports/{export.export_id}/download")
 
         # Assert
-        assert response.status_code == 409
-        assert "not ready" in response.json()["detail"].lower()
-
-    def test_download_export_failed(
-        self,
-        client: TestClient,
-        create_export,
-    ):
-        """Test that downloading failed export returns 410 Gone"""
-        # Arrange
-        export = create_export(
-            status="failed",
-            error_message="Generation failed",
-        )
-
-        # Act
-        response = client.get(f"/api/v1/exports/{export.export_id}/download")
-
-        # Assert
-        assert response.status_code == 410
-        assert "failed" in response.json()["detail"].lower()
-
-    def test_download_export_expired(
-        self,
-        client: TestClient,
-        create_export,
-    ):
-        """Test that downloading expired export returns 410 Gone"""
-        # Arrange
-        past_date = datetime.utcnow() - timedelta(days=1)
-        export = create_export(
-            status="completed",
-            storage_path="exports/exp-expired.zip",
-            expires_at=past_date,
-        )
-
-        # Act
-        response = client.get(f"/api/v1/exports/{export.export_id}/download")
-
-        # Assert
-        assert response.status_code == 410
-        assert "expired" in response.json()["detail"].lower()
+        assert response.status_code == expected_code
+        assert expected_detail in response.json()["detail"].lower()
 
 
 class TestExportListing:
     """Test export listing endpoints"""
 
+    # Seeded with one executemany INSERT per test; each test queries its own application
+    EXPORTS = [
+        {"export_id": "exp-1", "application_id": "app-list-exports", "status": "completed"},
+        {"export_id": "exp-2", "application_id": "app-list-exports", "status": "pending"},
+        {"export_id": "exp-3", "application_id": "other-app", "status": "completed"},
+        {"export_id": "exp-comp", "application_id": "app-filter-test", "status": "completed"},
+        {"export_id": "exp-pend", "application_id": "app-filter-test", "status": "pending"},
+        {"export_id": "exp-fail", "application_id": "app-filter-test", "status": "failed"},
+    ]
+
+    @pytest.fixture(autouse=True)
+    def seeded_exports(self, create_export_bulk):
+        return create_export_bulk(self.EXPORTS)
+
     def test_list_exports_for_application(
         self,
         client: TestClient,
-        create_export,
     ):
         """Test listing all exports for an application"""
         # Arrange
         app_id = "app-list-exports"
-        create_export(export_id="exp-1", application_id=app_id, status="completed")
-        create_export(export_id="exp-2", application_id=app_id, status="pending")
-        create_export(export_id="exp-3", application_id="other-app", status="completed")
 
         # Act
         response = client.get(f"/api/v1/exports?application_id={app_id}")
@@ -303,14 +302,10 @@ class TestExportListing:
     def test_list_exports_with_status_filter(
         self,
         client: TestClient,
-        create_export,
     ):
         """Test filtering exports by status"""
         # Arrange
         app_id = "app-filter-test"
-        create_export(export_id="exp-comp", application_id=app_id, status="completed")
-        create_export(export_id="exp-pend", application_id=app_id, status="pending")
-        create_export(export_id="exp-fail", application_id=app_id, status="failed")
 
         # Act
         response = client.get(f"/api/v1/exports?application_id={app_id}&status=completed")
@@ -325,100 +320,97 @@ class TestExportListing:
 class TestExportPackageGeneration:
     """Test export package generation logic"""
 
+    # Shared evidence set, inserted with one executemany per test; tests only read it
+    EVIDENCE = [
+        {"evidence_id": "ev-pkg-1", "storage_path": "evidence/aa/aaa111", "sha256_hash_server": "a" * 64},
+        {"evidence_id": "ev-pkg-2", "storage_path": "evidence/bb/bbb222", "sha256_hash_server": "b" * 64},
+    ]
+
+    @pytest.fixture(autouse=True)
+    def package_evidence(self, create_evidence_bulk, sample_export_data: Mapping[str, Any]):
+        scope = {
+            "application_id": sample_export_data["application_id"],
+            "tenant_id": sample_export_data["tenant_id"],
+        }
+        return create_evidence_bulk([{**record, **scope} for record in self.EVIDENCE])
+
     def test_export_package_structure(
         self,
         client: TestClient,
-        create_evidence,
-        create_export,
-        sample_export_data: dict[str, Any],
+        sample_export_data: Mapping[str, Any],
         test_db: Session,
     ):
         """Test that export package contains correct files"""
-        # Arrange
-        ev1 = create_evidence(
-            evidence_id="ev-pkg-1",
-            application_id=sample_export_data["application_id"],
-            tenant_id=sample_export_data["tenant_id"],
-            storage_path="evidence/aa/aaa111",
-            file_hash="a" * 64,
-        )
-        ev2 = create_evidence(
-            evidence_id="ev-pkg-2",
-            application_id=sample_export_data["application_id"],
-            tenant_id=sample_export_data["tenant_id"],
-            storage_path="evidence/bb/bbb222",
-            file_hash="b" * 64,
-        )
-
         # Act
-        response = client.post("/api/v1/exports", json=sample_export_data)
+        response = client.post("/api/v1/exports", json=_json_body(sample_export_data))
 
         # Assert
         assert response.status_code == 202
         export_id = response.json()["export_id"]
 
         # Verify export record has correct metadata
-        db_export = test_db.query(Export).filter_by(export_id=export_id).first()
-        assert db_export.options["include_metadata"] is True
-        assert db_export.options["include_signatures"] is True
+        db_export = test_db.execute(
+            select(Export.include_metadata, Export.sign_package).where(Export.export_id == export_id)
+        ).one()
+        assert db_export.include_metadata is True
+        assert db_export.sign_package is True
 
     def test_export_includes_manifest(
         self,
         client: TestClient,
-        create_evidence,
-        sample_export_data: dict[str, Any],
+        sample_export_data: Mapping[str, Any],
         test_db: Session,
     ):
         """Test that export includes manifest.json with metadata"""
-        # Arrange
-        create_evidence(
-            evidence_id="ev-manifest",
-            application_id=sample_export_data["application_id"],
-            tenant_id=sample_export_data["tenant_id"],
-        )
-
         # Act
-        response = client.post("/api/v1/exports", json=sample_export_data)
+        response = client.post("/api/v1/exports", json=_json_body(sample_export_data))
 
         # Assert
         assert response.status_code == 202
         # In a real test, we'd verify the ZIP contents
         # Here we verify the export was created with correct options
         export_id = response.json()["export_id"]
-        db_export = test_db.query(Export).filter_by(export_id=export_id).first()
-        assert db_export.options.get("include_metadata") is True
+        include_metadata = test_db.execute(
+            select(Export.include_metadata).where(Export.export_id == export_id)
+        ).scalar_one()
+        assert include_metadata is True
 
 
 class TestExportMultiTenancy:
     """Test multi-tenant isolation for exports"""
 
+    @pytest.fixture
+    def tenant_evidence(self, create_evidence_bulk, sample_export_data: Mapping[str, Any]):
+        """Two rows for the request's tenant and one for another tenant, same application"""
+        tenant_id = sample_export_data["tenant_id"]
+        app_id = sample_export_data["application_id"]
+        return create_evidence_bulk([
+            {"evidence_id": "tenant-ev-1", "tenant_id": tenant_id, "application_id": app_id},
+            {"evidence_id": "tenant-ev-2", "tenant_id": tenant_id, "application_id": app_id},
+            {"evidence_id": "other-tenant-ev", "tenant_id": "other-tenant", "application_id": app_id},
+        ])
+
     def test_tenant_cannot_access_other_tenant_export(
         self,
         client: TestClient,
-        create_export,
+        create_export_bulk,
     ):
         """Test that tenants cannot access each other's exports"""
         # Arrange
-        tenant1_export = create_export(
-            export_id="tenant1-export",
-            tenant_id="tenant-001",
-            application_id="app-001",
-        )
-        tenant2_export = create_export(
-            export_id="tenant2-export",
-            tenant_id="tenant-002",
-            application_id="app-001",
-        )
+        tenant1_export_id, tenant2_export_id = create_export_bulk([
+            {"export_id": "tenant1-export", "tenant_id": "tenant-001", "application_id": "app-001"},
+            {"export_id": "tenant2-export", "tenant_id": "tenant-002", "application_id": "app-001"},
+        ])
 
         # Act - Tenant 1 tries to access their export
         response1 = client.get(
-            f"/api/v1/exports/{tenant1_export.export_id}",
+            f"/api/v1/exports/{tenant1_export_id}",
             headers={"X-Tenant-ID": "tenant-001"},
         )
 
         # Act - Tenant 1 tries to access Tenant 2's export
         response2 = client.get(
-            f"/api/v1/exports/{tenant2_export.export_id}",
+            f"/api/v1/exports/{tenant2_export_id}",
             headers={"X-Tenant-ID": "tenant-001"},
         )
 
@@ -429,35 +421,12 @@ class TestExportMultiTenancy:
     def test_export_only_includes_tenant_evidence(
         self,
         client: TestClient,
-        create_evidence,
-        sample_export_data: dict[str, Any],
+        tenant_evidence: list[str],
+        sample_export_data: Mapping[str, Any],
     ):
         """Test that export only includes evidence from same tenant"""
-        # Arrange
-        tenant_id = sample_export_data["tenant_id"]
-        app_id = sample_export_data["application_id"]
-
-        # Create evidence for correct tenant
-        create_evidence(
-            evidence_id="tenant-ev-1",
-            tenant_id=tenant_id,
-            application_id=app_id,
-        )
-        create_evidence(
-            evidence_id="tenant-ev-2",
-            tenant_id=tenant_id,
-            application_id=app_id,
-        )
-
-        # Create evidence for different tenant (should not be included)
-        create_evidence(
-            evidence_id="other-tenant-ev",
-            tenant_id="other-tenant",
-            application_id=app_id,
-        )
-
         # Act
-        response = client.post("/api/v1/exports", json=sample_export_data)
+        response = client.post("/api/v1/exports", json=_json_body(sample_export_data))
 
         # Assert
         assert response.status_code == 202
@@ -465,6 +434,7 @@ class TestExportMultiTenancy:
         # The other tenant's evidence should not cause issues
 
 
+@pytest.mark.usefixtures("presigned_url_stub")
 class TestExportAuditLogging:
     """Test audit logging for export operations"""
 
@@ -472,7 +442,7 @@ class TestExportAuditLogging:
         self,
         client: TestClient,
         create_evidence,
-        sample_export_data: dict[str, Any],
+        sample_export_data: Mapping[str, Any],
         test_db: Session,
     ):
         """Test that export creation is logged in audit trail"""
@@ -484,7 +454,7 @@ class TestExportAuditLogging:
         )
 
         # Act
-        response = client.post("/api/v1/exports", json=sample_export_data)
+        response = client.post("/api/v1/exports", json=_json_body(sample_export_data))
 
         # Assert
         assert response.status_code == 202
@@ -511,12 +481,13 @@ class TestExportAuditLogging:
             status="completed",
             storage_path="exports/exp-audit.zip",
         )
-        mock_storage.generate_presigned_url.return_value = "https://storage.example.com/test"
 
         # Act
-        client.get(f"/api/v1/exports/{export.export_id}/download", allow_redirects=False)
+        response = client.get(f"/api/v1/exports/{export.export_id}/download", allow_redirects=False)
 
         # Assert
+        assert response.content == b""
+        mock_storage.client.get_blob_client.return_value.download_blob.assert_not_called()
         # Verify audit log (if AuditLog model exists)
         # audit_logs = test_db.query(AuditLog).filter_by(
         #     resource_type="export",
@@ -0,0 +1,107 @@
+"""
+Tests for single-pass upload ingest and the APP1 EXIF fast path
+"""
+import hashlib
+import io
+from unittest.mock import patch
+
+import piexif
+import pytest
+from PIL import Image
+
+from src.services.exif_extractor import exif_extractor
+from src.services import ingest as ingest_module
+from src.services.ingest import HEAD_SIZE, MIME_SNIFF_BYTES, find_jpeg_app1, ingest, sniff_mime
+
+
+def _jpeg_with_exif(size: tuple[int, int] = (64, 64)) -> bytes:
+    exif = piexif.dump({
+        "0th": {piexif.ImageIFD.Make: b"Canon", piexif.ImageIFD.Model: b"EOS"},
+        "Exif": {piexif.ExifIFD.DateTimeOriginal: b"2025:01:01 12:00:00"},
+        "GPS": {
+            piexif.GPSIFD.GPSLatitudeRef: b"N",
+            piexif.GPSIFD.GPSLatitude: ((64, 1), (8, 1), (4776, 100)),
+            piexif.GPSIFD.GPSLongitudeRef: b"W",
+            piexif.GPSIFD.GPSLongitude: ((21, 1), (56, 1), (3336, 100)),
+        },
+    })
+    buf = io.BytesIO()
+    Image.new("RGB", size, color="red").save(buf, format="JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def test_ingest_single_pass():
+    data = _jpeg_with_exif((800, 800)) + bytes(HEAD_SIZE)
+    acc = ingest(io.BytesIO(data))
+
+    assert acc.size == len(data)
+    assert acc.sha256 == hashlib.sha256(data).hexdigest()
+    assert acc.head == data[:HEAD_SIZE]
+    assert acc.getvalue() == data
+    assert sniff_mime(acc.head) == "image/jpeg"
+
+
+def test_app1_fast_path_matches_full_decode():
+    data = _jpeg_with_exif()
+    app1 = find_jpeg_app1(data)
+
+    assert app1 is not None and app1.startswith(b"Exif\x00\x00")
+    fast = exif_extractor.extract_from_app1(app1)
+    assert fast == exif_extractor._parse(Image.open(io.BytesIO(data)).info["exif"])
+    assert exif_extractor.extract(data) == fast
+    assert fast["gps_latitude"] == pytest.approx(64.1466, abs=1e-4)
+    assert fast["gps_longitude"] == pytest.approx(-21.9426, abs=1e-4)
+
+
+def test_raw_exif_only_when_requested():
+    data = _jpeg_with_exif()
+
+    assert "raw" not in exif_extractor.extract(data)
+    raw = exif_extractor.extract(data, include_raw=True)["raw"]
+    assert raw["0th"]
+    assert all(isinstance(v, str) for tags in raw.values() for v in tags.values())
+
+
+def test_extract_head_without_exif_defers_to_full_decode():
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="PNG")
+
+    assert exif_extractor.extract_head(buf.getvalue()) is None
+    assert exif_extractor.extract(buf.getvalue()) == {"has_exif": False}
+
+
+def test_full_decode_reads_png_exif_without_rescanning_head():
+    exif = piexif.dump({"0th": {piexif.ImageIFD.Make: b"Canon"}})
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="PNG", exif=exif)
+
+    with patch.object(exif_extractor, "extract_head", wraps=exif_extractor.extract_head) as head:
+        result = exif_extractor._extract_decoded(buf.getvalue())
+
+    assert result["has_exif"] is True
+    assert result["camera_make"] == "Canon"
+    head.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"%PDF-1.4\n%fake pdf content",
+        b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00\xff\xda\x00\x08",
+        b"\xff\xd8\xff\xe1\xff\xf0Exif\x00\x00truncated",
+    ],
+    ids=["not-jpeg", "no-exif", "truncated-app1"],
+)
+def test_find_jpeg_app1_none(data: bytes):
+    assert find_jpeg_app1(data) is None
+
+
+def test_sniff_mime_reads_header_only():
+    data = _jpeg_with_exif((512, 512))
+
+    assert sniff_mime(data) == sniff_mime(data, full=True) == "image/jpeg"
+    with patch.object(ingest_module._MIME_MAGIC, "from_buffer", return_value="image/jpeg") as sniff:
+        sniff_mime(data)
+        sniff_mime(data, full=True)
+
+    assert [len(call.args[0]) for call in sniff.call_args_list] == [MIME_SNIFF_BYTES, len(data)]
@@ -1,3 +1,6 @@
+import hashlib
+import io
+
 import pytest
 from datetime import datetime, timezone, timedelta
 from src.services.integrity import integrity_service
@@ -8,10 +11,19 @@ from src.schemas.evidence import (
     GpsCoordinates,
 )
 
+_PDF_TEST = b"%PDF-1.4\n%fake pdf content"
+_PHOTO = {"evidence_type": EvidenceType.PHOTO, "mime_type": "image/jpeg"}
+
 
-def test_integrity_pass():
-    """Test successful integrity validation"""
-    evidence = EvidenceUploadRequest(
+@pytest.fixture(scope="module")
+def baseline_evidence() -> EvidenceUploadRequest:
+    """
+    A document upload that passes every check; tests derive deltas with model_copy
+
+    Built (and the device clock read) once when the module's first test runs,
+    well inside MAX_TIME_DRIFT_SECONDS of the rest.
+    """
+    return EvidenceUploadRequest(
         evidence_id="ev_test_001",
         application_id="app_test_001",
         evidence_type=EvidenceType.DOCUMENT,
@@ -23,46 +35,116 @@ def test_integrity_pass():
         file_size_bytes=1000,
     )
 
-    file_bytes = b"%PDF-1.4\n%fake pdf content"
-    server_hash = "a" * 64
 
-    result, detected_mime = integrity_service.validate(
+@pytest.mark.parametrize(
+    "override, server_hash, failed_flag, expected_issue",
+    [
+        ({}, "a" * 64, None, None),
+        ({}, "b" * 64, "hash_match", "Hash mismatch"),
+        (
+            {"gps_coordinates": GpsCoordinates(latitude=64.1466, longitude=-21.9426, accuracy_meters=100.0)},
+            "a" * 64,
+            "gps_accuracy_ok",
+            "GPS accuracy insufficient",
+        ),
+        (
+            {"captured_at_device": datetime(2020, 1, 1, tzinfo=timezone.utc)},
+            "a" * 64,
+            "time_drift_ok",
+            "Time drift excessive",
+        ),
+        (
+            _PHOTO,
+            "a" * 64,
+            "exif_present",
+            "EXIF data required",
+        ),
+    ],
+    ids=["pass", "hash_mismatch", "gps_accuracy", "time_drift", "exif_required"],
+)
+def test_integrity_checks(baseline_evidence, override, server_hash, failed_flag, expected_issue):
+    """Each check flips its own flag and reports its own issue against a passing baseline"""
+    evidence = baseline_evidence.model_copy(update=override)
+
+    result, _ = integrity_service.validate(
         evidence=evidence,
         server_hash=server_hash,
         file_size=1000,
-        file_bytes=file_bytes,
+        file_stream=io.BytesIO(_PDF_TEST),
         exif_data={},
     )
 
-    assert result.hash_match is True
-    assert result.file_size_ok is True
+    if failed_flag is None:
+        assert result.integrity_passed is True
+        assert result.hash_match is True
+        assert result.file_size_ok is True
+        assert result.issues == []
+    else:
+        assert result.integrity_passed is False
+        assert getattr(result, failed_flag) is False
+        assert any(expected_issue in issue for issue in result.issues)
 
 
-def test_integrity_hash_mismatch():
-    """Test integrity failure on hash mismatch"""
-    evidence = EvidenceUploadRequest(
-        evidence_id="ev_test_002",
-        application_id="app_test_001",
-        evidence_type=EvidenceType.DOCUMENT,
-        sha256_hash_device="a" * 64,
-        captured_at_device=datetime.now(timezone.utc),
-        gps_coordinates=GpsCoordinates(latitude=64.1466, longitude=-21.9426, accuracy_meters=10.0),
-        uploader_role=UploaderRole.APPLICANT_OWNER,
-        mime_type="application/pdf",
-        file_size_bytes=1000,
+def test_integrity_naive_device_time_vs_exif(baseline_evidence):
+    """Naive device and EXIF timestamps are both treated as UTC"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    evidence = baseline_evidence.model_copy(update={**_PHOTO, "captured_at_device": now})
+
+    result, _ = integrity_service.validate(
+        evidence=evidence,
+        server_hash="a" * 64,
+        file_size=1000,
+        file_stream=io.BytesIO(b""),
+        exif_data={"has_exif": True, "datetime": now - timedelta(minutes=5)},
+        detected_mime="image/jpeg",
     )
 
-    file_bytes = b"%PDF-1.4\n%fake pdf content"
-    server_hash = "b" * 64
+    assert result.time_drift_ok is True
+    assert any("Timestamp mismatch" in issue for issue in result.issues)
 
-    result, detected_mime = integrity_service.validate(
+
+@pytest.mark.parametrize(
+    "exif_lat, exif_lon, mismatch",
+    [
+        (64.1466, -21.9446, False),  # 0.002 deg of longitude at 64N is ~97 m
+        (64.1474, -21.9426, False),  # ~89 m north
+        (64.1476, -21.9426, True),   # 0.001 deg of latitude is ~111 m
+        (64.1566, -21.9426, True),   # ~1.1 km north
+        (0.0, 0.0, True),
+    ],
+)
+def test_integrity_gps_cross_check_uses_distance(baseline_evidence, exif_lat, exif_lon, mismatch):
+    """EXIF vs declared GPS is compared by great-circle distance"""
+    evidence = baseline_evidence.model_copy(update=_PHOTO)
+
+    result, _ = integrity_service.validate(
         evidence=evidence,
-        server_hash=server_hash,
+        server_hash="a" * 64,
         file_size=1000,
-        file_bytes=file_bytes,
+        file_stream=io.BytesIO(b""),
+        exif_data={"has_exif": True, "gps_latitude": exif_lat, "gps_longitude": exif_lon},
+        detected_mime="image/jpeg",
+    )
+
+    assert any("GPS mismatch" in issue for issue in result.issues) is mismatch
+
+
+def test_integrity_hash_streamed_when_not_given(baseline_evidence):
+    """Without server_hash the stream is hashed in chunks and rewound for the MIME sniff"""
+    evidence = baseline_evidence.model_copy(update={
+        "sha256_hash_device": hashlib.sha256(_PDF_TEST).hexdigest(),
+        "file_size_bytes": len(_PDF_TEST),
+    })
+    stream = io.BytesIO(_PDF_TEST)
+    stream.seek(len(_PDF_TEST))
+
+    result, detected_mime = integrity_service.validate(
+        evidence=evidence,
+        file_stream=stream,
+        file_size=len(_PDF_TEST),
         exif_data={},
     )
 
-    assert result.integrity_passed is False
-    assert result.hash_match is False
-    assert any("Hash mismatch" in issue for issue in result.issues)
+    assert result.hash_match is True
+    assert detected_mime == "application/pdf"
+    assert result.integrity_passed is True
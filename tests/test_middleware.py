@@ -0,0 +1,139 @@
+"""
+Tests for the unified CORS / correlation ID / rate-limit middleware
+"""
+import pytest
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.core.middleware import UnifiedMiddleware
+
+pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
+
+ALLOWED_ORIGIN = settings.ALLOWED_ORIGINS[0]
+DISALLOWED_ORIGIN = "https://evil.example.com"
+
+
+class TestCors:
+    """CORS preflight and simple-request handling"""
+
+    def test_preflight_allowed_origin(self, client: TestClient):
+        response = client.options(
+            "/api/v1/evidence/ev_missing",
+            headers={
+                "Origin": ALLOWED_ORIGIN,
+                "Access-Control-Request-Method": "GET",
+                "Access-Control-Request-Headers": "authorization, content-type",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert "GET" in response.headers["access-control-allow-methods"]
+        assert response.headers["access-control-allow-headers"] == "authorization, content-type"
+        assert response.headers["access-control-max-age"] == "600"
+        assert response.headers["vary"] == "Origin"
+        # Preflights never consume rate-limit tokens
+        assert "x-ratelimit-remaining-minute" not in response.headers
+
+    def test_preflight_disallowed_origin(self, client: TestClient):
+        response = client.options(
+            "/api/v1/evidence/ev_missing",
+            headers={"Origin": DISALLOWED_ORIGIN, "Access-Control-Request-Method": "GET"},
+        )
+
+        assert response.status_code == 400
+        assert "access-control-allow-origin" not in response.headers
+
+    def test_simple_request_allowed_origin(self, client: TestClient):
+        response = client.get("/health", headers={"Origin": ALLOWED_ORIGIN})
+
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+        assert "X-Correlation-Id" in response.headers["access-control-expose-headers"]
+        assert response.headers.get_list("vary") == ["Origin"]
+
+    def test_vary_merged_with_existing_header(self):
+        async def app(scope, receive, send):
+            response = PlainTextResponse("ok", headers={"Vary": "Accept-Encoding"})
+            await response(scope, receive, send)
+
+        bare_client = TestClient(UnifiedMiddleware(app, allow_origins=[ALLOWED_ORIGIN]))
+        response = bare_client.get("/", headers={"Origin": ALLOWED_ORIGIN})
+
+        assert response.headers.get_list("vary") == ["Accept-Encoding, Origin"]
+
+    def test_simple_request_disallowed_origin(self, client: TestClient):
+        response = client.get("/health", headers={"Origin": DISALLOWED_ORIGIN})
+
+        assert "access-control-allow-origin" not in response.headers
+        assert "access-control-allow-credentials" not in response.headers
+        assert "access-control-expose-headers" not in response.headers
+
+
+class TestCorrelationId:
+    """Correlation ID propagation"""
+
+    def test_incoming_correlation_id_echoed(self, client: TestClient):
+        response = client.get(
+            "/api/v1/evidence/ev_missing",
+            headers={"X-Correlation-Id": "corr-test-001"},
+        )
+
+        assert response.status_code == 404
+        assert response.headers["x-correlation-id"] == "corr-test-001"
+        # problem_response reads request.state.correlation_id
+        assert response.json()["correlation_id"] == "corr-test-001"
+
+    def test_correlation_id_generated(self, client: TestClient):
+        response = client.get("/api/v1/evidence/ev_missing")
+
+        correlation_id = response.headers["x-correlation-id"]
+        assert correlation_id
+        assert response.json()["correlation_id"] == correlation_id
+
+
+@pytest.mark.skipif(not settings.RATE_LIMIT_ENABLED, reason="rate limiting disabled")
+class TestRateLimitHeaders:
+    """Rate-limit headers, 429 body and exempt paths"""
+
+    def test_remaining_headers(self, client: TestClient):
+        response = client.get("/api/v1/evidence/ev_missing")
+
+        assert response.headers["x-ratelimit-remaining-minute"] == str(settings.RATE_LIMIT_PER_MINUTE - 1)
+        assert response.headers["x-ratelimit-remaining-hour"] == str(settings.RATE_LIMIT_PER_HOUR - 1)
+        assert response.headers["x-ratelimit-limit"] == str(settings.RATE_LIMIT_PER_MINUTE)
+        assert response.headers["x-ratelimit-remaining"] == str(settings.RATE_LIMIT_PER_MINUTE - 1)
+        # One token spent: full again after one refill interval
+        assert 0 < int(response.headers["x-ratelimit-reset"]) <= 60 // settings.RATE_LIMIT_PER_MINUTE + 1
+
+    def test_429_body(self, client: TestClient):
+        for _ in range(settings.RATE_LIMIT_PER_MINUTE):
+            assert client.get("/api/v1/evidence/ev_missing").status_code == 404
+
+        response = client.get(
+            "/api/v1/evidence/ev_missing",
+            headers={"X-Correlation-Id": "corr-limited", "Origin": ALLOWED_ORIGIN},
+        )
+
+        assert response.status_code == 429
+        assert response.json() == {
+            "type": "https://permia.is/errors/rate-limit-exceeded",
+            "title": "Rate Limit Exceeded",
+            "status": 429,
+            "detail": "Too many requests. Please try again later.",
+        }
+        assert response.headers["retry-after"] == "60"
+        assert response.headers["x-ratelimit-remaining-minute"] == "0"
+        assert response.headers["x-ratelimit-remaining"] == "0"
+        assert int(response.headers["x-ratelimit-reset"]) > 0
+        assert response.headers["x-correlation-id"] == "corr-limited"
+        assert response.headers["access-control-allow-origin"] == ALLOWED_ORIGIN
+
+    @pytest.mark.parametrize("path", ["/health", "/livez", "/"])
+    def test_exempt_paths(self, client: TestClient, path: str):
+        for _ in range(settings.RATE_LIMIT_PER_MINUTE + 5):
+            response = client.get(path)
+            assert response.status_code != 429
+
+        assert "x-ratelimit-remaining-minute" not in response.headers
@@ -8,12 +8,17 @@ Tests cover:
 - Rate limiter configuration
 """
 import pytest
-from typing import Any
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Mapping
 from fastapi.testclient import TestClient
 
-from src.core.rate_limit import rate_limiter
+from src.core import rate_limit
+from src.core.rate_limit import TokenBucket, rate_limiter
 from src.core.config import settings
 
+pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
+
 
 class TestRateLimiting:
     """Test rate limiting middleware"""
@@ -29,21 +34,21 @@ class TestRateLimiting:
         """Test that rate limit is enforced after threshold"""
         # Arrange
         limit = settings.RATE_LIMIT_PER_MINUTE
-        client_id = "test-client-001"
+        client_id = "203.0.113.1"
 
         # Act - Make requests up to the limit
         responses = []
+        upload = io.BytesIO(sample_image)
         for i in range(limit + 5):  # Go over the limit
-            import io
-            files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
-            data = sample_evidence_data.copy()
-            data["evidence_id"] = f"test-evidence-{i}"
+            upload.seek(0)
+            files = {"file": ("test.jpg", upload, "image/jpeg")}
+            data = sample_evidence_data | {"evidence_id": f"test-evidence-{i}"}
 
             response = client.post(
                 "/api/v1/evidence/upload",
                 data=data,
                 files=files,
-                headers={"X-Client-ID": client_id},
+                headers={"X-Forwarded-For": client_id},
             )
             responses.append(response)
 
@@ -52,9 +57,8 @@ class TestRateLimiting:
         for response in responses[:limit]:
             assert response.status_code != 429
 
-        # Requests over limit should return 429
-        over_limit_responses = [r for r in responses[limit:] if r.status_code == 429]
-        assert len(over_limit_responses) > 0  # At least some should be rate limited
+        # Requests over limit should return 429 (at least some of them)
+        assert any(r.status_code == 429 for r in responses[limit:])
 
     def test_rate_limit_headers(
         self,
@@ -63,28 +67,28 @@ class TestRateLimiting:
     ):
         """Test that rate limit headers are included in responses"""
         # Arrange
-        create_evidence(evidence_id="test-headers-001")
+        create_evidence(evidence_id="test-headers-001", tenant_id="dev_tenant")
 
         # Act
         response = client.get("/api/v1/evidence/test-headers-001")
 
         # Assert
         assert response.status_code == 200
-        # Check for standard rate limit headers (if implemented)
-        # assert "X-RateLimit-Limit" in response.headers
-        # assert "X-RateLimit-Remaining" in response.headers
-        # assert "X-RateLimit-Reset" in response.headers
+        # Check for standard rate limit headers
+        assert "X-RateLimit-Limit" in response.headers
+        assert "X-RateLimit-Remaining" in response.headers
+        assert "X-RateLimit-Reset" in response.headers
 
     def test_rate_limit_across_endpoints(
         self,
         client: TestClient,
         create_evidence,
-        sample_export_data: dict[str, Any],
+        sample_export_data: Mapping[str, Any],
     ):
         """Test that rate limit applies across different endpoints"""
         # Arrange
         limit = settings.RATE_LIMIT_PER_MINUTE
-        client_id = "test-client-002"
+        client_id = "203.0.113.2"
         create_evidence(
             evidence_id="ev-rate-test",
             application_id=sample_export_data["application_id"],
@@ -98,21 +102,19 @@ class TestRateLimiting:
                 # Get evidence
                 response = client.get(
                     "/api/v1/evidence/ev-rate-test",
-                    headers={"X-Client-ID": client_id},
+                    headers={"X-Forwarded-For": client_id},
                 )
             else:
                 # Create export
                 response = client.post(
                     "/api/v1/exports",
-                    json=sample_export_data,
-                    headers={"X-Client-ID": client_id},
+                    json=dict(sample_export_data, options=dict(sample_export_data["options"])),
+                    headers={"X-Forwarded-For": client_id},
                 )
             responses.append(response)
 
-        # Assert - Should be rate limited across all endpoints
-        over_limit_responses = [r for r in responses if r.status_code == 429]
-        # Some requests should be rate limited (rate limit is shared across endpoints)
-        # Note: This depends on implementation - might be per-endpoint or global
+        # Assert - One bucket per client, shared across endpoints
+        assert any(r.status_code == 429 for r in responses[limit:])
 
     def test_rate_limit_per_client(
         self,
@@ -121,20 +123,20 @@ class TestRateLimiting:
     ):
         """Test that rate limits are enforced per client"""
         # Arrange
-        create_evidence(evidence_id="test-per-client")
+        create_evidence(evidence_id="test-per-client", tenant_id="dev_tenant")
         limit = settings.RATE_LIMIT_PER_MINUTE
 
         # Act - Client 1 makes many requests
         for i in range(limit):
             client.get(
                 "/api/v1/evidence/test-per-client",
-                headers={"X-Client-ID": "client-1"},
+                headers={"X-Forwarded-For": "203.0.113.11"},
             )
 
         # Client 2 should still have full quota
         response_client2 = client.get(
             "/api/v1/evidence/test-per-client",
-            headers={"X-Client-ID": "client-2"},
+            headers={"X-Forwarded-For": "203.0.113.12"},
         )
 
         # Assert
@@ -151,14 +153,14 @@ class TestRateLimiterConfiguration:
     ):
         """Test that rate limiter can be reset"""
         # Arrange
-        create_evidence(evidence_id="test-reset")
-        client_id = "test-client-reset"
+        create_evidence(evidence_id="test-reset", tenant_id="dev_tenant")
+        client_id = "203.0.113.21"
 
         # Make some requests
         for i in range(10):
             client.get(
                 "/api/v1/evidence/test-reset",
-                headers={"X-Client-ID": client_id},
+                headers={"X-Forwarded-For": client_id},
             )
 
         # Act - Reset rate limiter
@@ -167,7 +169,7 @@ class TestRateLimiterConfiguration:
         # Make more requests - should succeed
         response = client.get(
             "/api/v1/evidence/test-reset",
-            headers={"X-Client-ID": client_id},
+            headers={"X-Forwarded-For": client_id},
         )
 
         # Assert
@@ -207,15 +209,161 @@ class TestRateLimiterConfiguration:
         # Note: This test would require time manipulation
         # Simplified version just verifies behavior
         # Arrange
-        create_evidence(evidence_id="test-expiry")
-        client_id = "test-client-expiry"
+        create_evidence(evidence_id="test-expiry", tenant_id="dev_tenant")
+        client_id = "203.0.113.22"
 
         # Act - Make requests
         response1 = client.get(
             "/api/v1/evidence/test-expiry",
-            headers={"X-Client-ID": client_id},
+            headers={"X-Forwarded-For": client_id},
         )
 
         # In real test, we'd wait for window to expire or mock time
         # For now, just verify first request works
         assert response1.status_code == 200
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTokenBucket:
+    """Token bucket refill and consumption, driven by a fake clock"""
+
+    def test_burst_up_to_capacity(self):
+        limiter = TokenBucket(rate_per_minute=3, rate_per_hour=100, clock=FakeClock())
+
+        results = [limiter.consume("client") for _ in range(4)]
+
+        assert results == [
+            (True, 2, 99, 20),
+            (True, 1, 98, 40),
+            (True, 0, 97, 60),
+            (False, 0, 97, 60),
+        ]
+
+    def test_continuous_refill(self):
+        clock = FakeClock()
+        limiter = TokenBucket(rate_per_minute=60, rate_per_hour=1000, clock=clock)
+        for _ in range(60):
+            limiter.consume("client")
+        assert limiter.consume("client")[0] is False
+
+        clock.now += 1.0  # one token per second
+        assert limiter.consume("client")[0] is True
+        assert limiter.consume("client")[0] is False
+
+    def test_refill_not_double_counted(self):
+        clock = FakeClock()
+        limiter = TokenBucket(rate_per_minute=60, rate_per_hour=1000, clock=clock)
+        for _ in range(60):
+            limiter.consume("client")
+
+        clock.now += 2.5
+        allowed = [limiter.consume("client")[0] for _ in range(5)]
+
+        assert allowed == [True, True, False, False, False]
+
+    def test_hour_bucket_limits_independently(self):
+        clock = FakeClock()
+        limiter = TokenBucket(rate_per_minute=60, rate_per_hour=2, clock=clock)
+
+        assert [limiter.consume("client")[0] for _ in range(3)] == [True, True, False]
+        clock.now += 60
+        assert limiter.consume("client")[0] is False
+
+    def test_clients_isolated(self):
+        limiter = TokenBucket(rate_per_minute=1, rate_per_hour=10, clock=FakeClock())
+
+        assert limiter.consume("a")[0] is True
+        assert limiter.consume("a")[0] is False
+        assert limiter.consume("b")[0] is True
+
+    def test_concurrent_consumers_share_capacity(self):
+        limiter = TokenBucket(rate_per_minute=50, rate_per_hour=1000, clock=FakeClock())
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: limiter.consume("client")[0], range(200)))
+
+        assert results.count(True) == 50
+
+    def test_concurrent_clients_across_stripes(self):
+        limiter = TokenBucket(rate_per_minute=5, rate_per_hour=1000, stripes=4, clock=FakeClock())
+        keys = [f"client-{i}" for i in range(16)] * 20
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda key: (key, limiter.consume(key)[0]), keys))
+
+        allowed = [key for key, ok in results if ok]
+        assert {key: allowed.count(key) for key in set(keys)} == {key: 5 for key in set(keys)}
+
+    def test_limit_holds_for_many_clients_below_cap(self):
+        limiter = TokenBucket(rate_per_minute=1, rate_per_hour=10, max_clients=500, clock=FakeClock())
+        keys = [f"client-{i}" for i in range(500)]
+
+        assert all(limiter.consume(key)[0] for key in keys)
+
+        # No stripe evicts while the total is under the cap, so nobody gets a fresh bucket
+        assert not any(limiter.consume(key)[0] for key in keys)
+
+    def test_client_cap_is_global(self):
+        limiter = TokenBucket(rate_per_minute=1, rate_per_hour=10, max_clients=8, clock=FakeClock())
+
+        for i in range(100):
+            limiter.consume(f"client-{i}")
+
+        assert len(limiter.buckets) == 8
+
+    def test_client_cap_holds_under_concurrency(self):
+        limiter = TokenBucket(rate_per_minute=1, rate_per_hour=10, max_clients=50, stripes=8, clock=FakeClock())
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: limiter.consume(f"client-{i}"), range(2000)))
+
+        assert len(limiter.buckets) == 50
+
+    @pytest.mark.parametrize("per_minute, per_hour", [(0, 10), (1, 0), (-1, 10)])
+    def test_rates_must_be_positive(self, per_minute: int, per_hour: int):
+        with pytest.raises(ValueError):
+            TokenBucket(rate_per_minute=per_minute, rate_per_hour=per_hour)
+
+    def test_stripes_must_be_power_of_two(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate_per_minute=1, rate_per_hour=10, stripes=3)
+
+    def test_least_recently_used_client_evicted(self):
+        limiter = TokenBucket(rate_per_minute=1, rate_per_hour=10, max_clients=2, stripes=1, clock=FakeClock())
+        limiter.consume("a")
+        limiter.consume("b")
+        limiter.consume("a")  # "b" is now least recently used
+
+        limiter.consume("c")
+
+        assert list(limiter.buckets) == ["a", "c"]
+        assert limiter.consume("b")[0] is True  # evicted, starts from a full bucket
+
+    def test_idle_buckets_swept(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "SWEEP_INTERVAL", 3)
+        clock = FakeClock()
+        limiter = TokenBucket(rate_per_minute=10, rate_per_hour=100, clock=clock)
+        limiter.consume("idle")
+        clock.now += 3600 + 1
+        limiter.consume("active")
+
+        limiter.consume("active")  # third check triggers the sweep
+
+        assert list(limiter.buckets) == ["active"]
+
+    def test_reset_all(self):
+        limiter = TokenBucket(rate_per_minute=1, rate_per_hour=10, clock=FakeClock())
+        limiter.consume("client")
+
+        limiter.reset_all()
+
+        assert limiter.consume("client") == (True, 0, 9, 60)
@@ -0,0 +1,36 @@
+"""
+Tests for StorageService helpers that do not touch Azure
+"""
+import hashlib
+import io
+from unittest.mock import patch
+
+import pytest
+from azure.core.exceptions import ResourceExistsError
+
+from src.services.storage import HASH_CHUNK_SIZE, storage_service
+
+
+@pytest.mark.parametrize("size", [0, 1, HASH_CHUNK_SIZE, HASH_CHUNK_SIZE * 3 + 17])
+def test_hashes_match_hashlib(size: int):
+    data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+    expected = hashlib.sha256(data).hexdigest()
+
+    assert storage_service.compute_hash_streaming(data) == expected
+    assert storage_service.compute_hash_stream(io.BytesIO(data)) == expected
+
+
+@pytest.mark.parametrize("exists", [False, True])
+def test_upload_file_single_round_trip(exists: bool):
+    sha = "ab" * 32
+    with patch.object(storage_service, "client") as client:
+        blob_client = client.get_blob_client.return_value
+        if exists:
+            blob_client.upload_blob.side_effect = ResourceExistsError("BlobAlreadyExists")
+
+        path = storage_service.upload_file(b"data", sha, "image/jpeg")
+
+    assert path == f"evidence/ab/{sha}"
+    blob_client.upload_blob.assert_called_once()
+    assert blob_client.upload_blob.call_args.kwargs["overwrite"] is False
+    blob_client.exists.assert_not_called()
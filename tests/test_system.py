@@ -0,0 +1,38 @@
+"""
+Tests for the system endpoints (/, /livez)
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.main import DOCS_ENABLED
+
+pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
+
+
+def test_root(client: TestClient):
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "service": settings.API_TITLE,
+        "version": "0.1.0",
+        "environment": settings.ENVIRONMENT,
+        "docs": "/docs" if DOCS_ENABLED else None,
+        "health": "/health",
+    }
+
+
+def test_livez(client: TestClient):
+    response = client.get("/livez")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_openapi_served_outside_production(client: TestClient):
+    response = client.get("/openapi.json")
+
+    assert response.status_code == 200
+    assert "BearerAuth" in response.json()["components"]["securitySchemes"]
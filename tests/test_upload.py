@@ -12,14 +12,57 @@ Tests cover:
 - Multi-tenant isolation
 - Evidence retrieval
 """
+import pytest
 import io
-import hashlib
-from datetime import datetime, timedelta
-from typing import Any
+import json
+import time
+from typing import Any, Iterator
 from fastapi.testclient import TestClient
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from src.db.models import Evidence
+from src.core.mime_config import MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES
+from src.db.models import AuditLog, Evidence
+
+pytestmark = pytest.mark.usefixtures("reset_rate_limiter")
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MULTIPART_BOUNDARY = "permia-test-boundary"
+
+
+def _streamed_upload(
+    fields: dict[str, Any],
+    filename: str,
+    content_type: str,
+    size: int,
+) -> tuple[dict[str, str], Iterator[bytes]]:
+    """
+    Multipart body for a zero-filled file of `size` bytes, sent 1 MB at a time
+
+    Content-Length is computed up front, so the server can refuse the upload
+    from its headers; no more than one chunk of the file is held at once.
+    """
+    head = b"".join(
+        f'--{MULTIPART_BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ) + (
+        f'--{MULTIPART_BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{MULTIPART_BOUNDARY}--\r\n".encode()
+
+    def body() -> Iterator[bytes]:
+        yield head
+        chunk = bytes(UPLOAD_CHUNK_SIZE)
+        for offset in range(0, size, UPLOAD_CHUNK_SIZE):
+            yield chunk[:size - offset]
+        yield tail
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={MULTIPART_BOUNDARY}",
+        "Content-Length": str(len(head) + size + len(tail)),
+    }
+    return headers, body()
 
 
 class TestEvidenceUpload:
@@ -29,6 +72,7 @@ class TestEvidenceUpload:
         self,
         client: TestClient,
         sample_image: bytes,
+        sample_image_sha256: str,
         sample_evidence_data: dict[str, Any],
         mock_storage,
         mock_exif,
@@ -51,9 +95,9 @@ class TestEvidenceUpload:
         assert "uploaded_at" in result
 
         # Verify database record
-        db_evidence = test_db.query(Evidence).filter_by(evidence_id=data["evidence_id"]).first()
+        db_evidence = test_db.get(Evidence, data["evidence_id"])
         assert db_evidence is not None
-        assert db_evidence.file_hash == data["file_hash"]
+        assert db_evidence.file_hash == sample_image_sha256
         assert db_evidence.application_id == data["application_id"]
         assert db_evidence.tenant_id == data["tenant_id"]
 
@@ -83,6 +127,37 @@ class TestEvidenceUpload:
         assert response.status_code == 409
         assert "already exists" in response.json()["detail"].lower()
 
+    def test_oversized_upload_refused_before_reading_body(
+        self,
+        client: TestClient,
+        test_db: Session,
+    ):
+        """The route's Content-Length precheck answers before the form is parsed"""
+        # Arrange
+        size = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES + 1
+        chunks_read = []
+
+        def body() -> Iterator[bytes]:
+            chunks_read.append(1)
+            yield b"--unused--\r\n"
+
+        # Act
+        response = client.post(
+            "/api/v1/evidence/",
+            content=body(),
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={MULTIPART_BOUNDARY}",
+                "Content-Length": str(size),
+            },
+        )
+
+        # Assert
+        assert response.status_code == 413
+        assert response.json()["code"] == "FILE_TOO_LARGE"
+        assert chunks_read == []
+        audit = test_db.scalars(select(AuditLog).where(AuditLog.resource_id == "precheck")).one()
+        assert audit.audit_metadata == {"reason": "content_length_exceeds_limit", "size": size}
+
     def test_upload_file_too_large(
         self,
         client: TestClient,
@@ -92,19 +167,17 @@ class TestEvidenceUpload:
     ):
         """Test that files exceeding size limit are rejected with 413"""
         # Arrange - Create file larger than 100MB
-        large_file = b"x" * (101 * 1024 * 1024)  # 101 MB
-        files = {"file": ("large.jpg", io.BytesIO(large_file), "image/jpeg")}
-
-        data = sample_evidence_data.copy()
-        data["file_size"] = len(large_file)
-        data["file_hash"] = hashlib.sha256(large_file).hexdigest()
+        large_size = 101 * 1024 * 1024  # 101 MB
+        # Refused from Content-Length, so the metadata is never parsed
+        data = {"evidence_json": json.dumps(sample_evidence_data | {"file_size": large_size})}
+        headers, body = _streamed_upload(data, "large.jpg", "image/jpeg", large_size)
 
         # Act
-        response = client.post("/api/v1/evidence/upload", data=data, files=files)
+        response = client.post("/api/v1/evidence/", content=body, headers=headers)
 
         # Assert
         assert response.status_code == 413
-        assert "too large" in response.json()["detail"].lower()
+        assert response.json()["code"] == "FILE_TOO_LARGE"
 
     def test_upload_hash_mismatch(
         self,
@@ -117,8 +190,7 @@ class TestEvidenceUpload:
         """Test that hash mismatch is detected and rejected"""
         # Arrange
         files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
-        data = sample_evidence_data.copy()
-        data["file_hash"] = "0" * 64  # Wrong hash
+        data = sample_evidence_data | {"file_hash": "0" * 64}  # Wrong hash
 
         # Act
         response = client.post("/api/v1/evidence/upload", data=data, files=files)
@@ -174,8 +246,7 @@ class TestEvidenceUpload:
         """Test idempotency key prevents duplicate processing"""
         # Arrange
         files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
-        data = sample_evidence_data.copy()
-        data["idempotency_key"] = "unique-request-001"
+        data = sample_evidence_data | {"idempotency_key": "unique-request-001"}
 
         # Act - First request
         response1 = client.post("/api/v1/evidence/upload", data=data, files=files)
@@ -208,7 +279,7 @@ class TestEvidenceUpload:
                 "longitude": -21.9426,
                 "accuracy": 100.0,  # Too low (> 50m threshold)
             },
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time.time(),
         }
 
         files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
@@ -231,14 +302,14 @@ class TestEvidenceUpload:
     ):
         """Test that excessive time drift is rejected"""
         # Arrange
-        old_time = datetime.utcnow() - timedelta(seconds=60)  # 60s drift > 30s threshold
+        old_time = time.time() - 60  # 60s drift > 30s threshold
         mock_exif.extract_metadata.return_value = {
             "gps": {
                 "latitude": 64.1466,
                 "longitude": -21.9426,
                 "accuracy": 10.0,
             },
-            "timestamp": old_time.isoformat(),
+            "timestamp": old_time,
         }
 
         files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
@@ -344,13 +415,14 @@ class TestEvidenceRetrieval:
     def test_list_evidence_with_pagination(
         self,
         client: TestClient,
-        create_evidence,
+        create_evidence_bulk,
     ):
         """Test evidence listing supports pagination"""
         # Arrange
         app_id = "app-pagination-test"
-        for i in range(10):
-            create_evidence(evidence_id=f"ev-{i}", application_id=app_id)
+        create_evidence_bulk(
+            [{"evidence_id": f"ev-{i}", "application_id": app_id} for i in range(10)]
+        )
 
         # Act
         response = client.get(f"/api/v1/evidence?application_id={app_id}&limit=5")
@@ -384,6 +456,7 @@ class TestEvidenceRetrieval:
 class TestEvidenceValidation:
     """Test evidence validation logic"""
 
+    @pytest.mark.parametrize("mime_type", ["image/jpeg", "image/png", "video/mp4", "application/pdf"])
     def test_validate_mime_type_allowed(
         self,
         client: TestClient,
@@ -391,22 +464,21 @@ class TestEvidenceValidation:
         sample_image: bytes,
         mock_storage,
         mock_exif,
+        mime_type: str,
     ):
         """Test that allowed MIME types are accepted"""
         # Arrange
-        allowed_types = ["image/jpeg", "image/png", "video/mp4", "application/pdf"]
-
-        for mime_type in allowed_types:
-            files = {"file": ("test.jpg", io.BytesIO(sample_image), mime_type)}
-            data = sample_evidence_data.copy()
-            data["evidence_id"] = f"test-{mime_type.replace('/', '-')}"
-            data["mime_type"] = mime_type
+        files = {"file": ("test.jpg", io.BytesIO(sample_image), mime_type)}
+        data = sample_evidence_data | {
+            "evidence_id": f"test-{mime_type.replace('/', '-')}",
+            "mime_type": mime_type,
+        }
 
-            # Act
-            response = client.post("/api/v1/evidence/upload", data=data, files=files)
+        # Act
+        response = client.post("/api/v1/evidence/upload", data=data, files=files)
 
-            # Assert
-            assert response.status_code in [201, 400]  # 201 success or 400 for other validation
+        # Assert
+        assert response.status_code in [201, 400]  # 201 success or 400 for other validation
 
     def test_validate_file_hash_format(
         self,
@@ -417,8 +489,7 @@ class TestEvidenceValidation:
         """Test that file_hash must be valid SHA-256 (64 hex chars)"""
         # Arrange
         files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
-        data = sample_evidence_data.copy()
-        data["file_hash"] = "invalid-hash"  # Not 64 hex chars
+        data = sample_evidence_data | {"file_hash": "invalid-hash"}  # Not 64 hex chars
 
         # Act
         response = client.post("/api/v1/evidence/upload", data=data, files=files)
@@ -435,8 +506,7 @@ class TestEvidenceValidation:
         """Test that timestamp must be valid ISO 8601 format"""
         # Arrange
         files = {"file": ("test.jpg", io.BytesIO(sample_image), "image/jpeg")}
-        data = sample_evidence_data.copy()
-        data["timestamp"] = "invalid-timestamp"
+        data = sample_evidence_data | {"timestamp": "invalid-timestamp"}
 
         # Act
         response = client.post("/api/v1/evidence/upload", data=data, files=files)